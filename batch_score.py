@@ -0,0 +1,42 @@
+"""
+Score the whole client portfolio with ressource/pipeline.joblib.
+
+Streams the dataset in chunks (Parquet copy if available, CSV otherwise),
+runs the pipeline's predict_proba on each chunk, optionally across a process
+pool, and writes SK_ID_CURR + score to a Parquet file tagged with the model
+version.
+
+Usage:
+    python batch_score.py [--dataset data/dataset_sample.csv] [--out data/scores.parquet]
+                          [--chunksize 50000] [--jobs 4]
+"""
+
+import argparse
+import os
+
+from utils import batch_score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch scoring of the client portfolio")
+    parser.add_argument('--dataset', default='data/dataset_sample.csv')
+    parser.add_argument('--pipeline', default='ressource/pipeline.joblib')
+    parser.add_argument('--out', default='data/scores.parquet')
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--jobs', type=int, default=1, help="Worker processes (default: 1)")
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    print(f"Scoring {args.dataset} with {args.pipeline} ({jobs} process(es), chunks of {args.chunksize})...")
+    result = batch_score(args.dataset,
+                         pipeline_path=args.pipeline,
+                         out_path=args.out,
+                         chunksize=args.chunksize,
+                         n_jobs=jobs,
+                         progress=lambda rows: print(f"  {rows:,} rows scored", end='\r'))
+    print(f"\n✓ {result['rows']:,} scores -> {result['out_path']} "
+          f"(model {result['model_version']}, {result['seconds']:.1f}s, {result['rows_per_sec']:,.0f} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Build the artifact manifest (ressource/manifest.json).
+
+Loads every serialized artifact of the directory once, probing dill, pickle
+and joblib, and records the loader that worked together with the file size,
+SHA-256 and library versions. read_pickle then goes straight to that loader
+instead of re-reading the file with each deserializer in turn.
+
+Usage:
+    python build_artifact_manifest.py [directory] [--mmap]
+"""
+
+import argparse
+import os
+import time
+
+from utils import ARTIFACT_MANIFEST, artifact_manifest_entry, read_pickle
+
+# Sidecars of the memory-mapped stores and the manifest itself are not pickles
+SKIPPED_EXTENSIONS = ('.json', '.npy', '.tmp')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record how each artifact must be deserialized")
+    parser.add_argument('directory', nargs='?', default='ressource')
+    parser.add_argument('--mmap', action='store_true', help="Probe joblib with mmap_mode='r' first")
+    args = parser.parse_args()
+
+    for name in sorted(os.listdir(args.directory)):
+        path = os.path.join(args.directory, name)
+        if name == ARTIFACT_MANIFEST or name.endswith(SKIPPED_EXTENSIONS) or not os.path.isfile(path):
+            continue
+        start = time.perf_counter()
+        try:
+            read_pickle(path, mmap_mode='r' if args.mmap else None)
+        except Exception as exc:
+            print(f"✗ {path}: {exc}")
+            continue
+        elapsed = time.perf_counter() - start
+        entry = artifact_manifest_entry(path)
+        if entry is None:
+            print(f"✗ {path}: loaded but the manifest could not be written")
+            continue
+        print(f"✓ {path}: {entry['loader']} ({entry['size'] / 1e6:.1f} MB, {elapsed:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Build the columnar copies of the dashboard datasets.
+
+Converts data/dataset_sample.csv and data/application_sample.csv to typed
+Parquet (or Feather) files next to the CSVs. read_df picks them up
+automatically as long as they are not older than their CSV.
+
+Also precomputes the per-feature statistics (histograms, percentiles,
+per-TARGET summaries) used by the distribution view, saved as
+<dataset>.stats.json.
+
+Usage:
+    python build_data_store.py [--format parquet|feather] [--bins 20 50] [--no-stats] [csv ...]
+"""
+
+import argparse
+import os
+import time
+
+from utils import FeatureStats, convert_to_columnar, feature_stats_path, read_df
+
+DEFAULT_DATASETS = ['data/dataset_sample.csv', 'data/application_sample.csv']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert dashboard CSV datasets to columnar files")
+    parser.add_argument('paths', nargs='*', default=DEFAULT_DATASETS, help="CSV files to convert")
+    parser.add_argument('--format', choices=['parquet', 'feather'], default='parquet')
+    parser.add_argument('--bins', type=int, nargs='+', default=[20], help="Histogram bin counts to precompute")
+    parser.add_argument('--no-stats', action='store_true', help="Skip the feature statistics")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"Skipping {path}: file not found")
+            continue
+        start = time.perf_counter()
+        out_path, shape = convert_to_columnar(path, fmt=args.format)
+        elapsed = time.perf_counter() - start
+        csv_size = os.path.getsize(path) / 1e6
+        out_size = os.path.getsize(out_path) / 1e6
+        print(f"✓ {path} -> {out_path} {shape} ({csv_size:.1f} MB -> {out_size:.1f} MB, {elapsed:.1f}s)")
+
+        if not args.no_stats:
+            start = time.perf_counter()
+            stats = FeatureStats.build(read_df(path), bins=args.bins)
+            stats_path = feature_stats_path(path)
+            stats.save(stats_path)
+            elapsed = time.perf_counter() - start
+            print(f"✓ {len(stats.columns)} feature statistics -> {stats_path} ({elapsed:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
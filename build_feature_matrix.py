@@ -0,0 +1,45 @@
+"""
+Build the memory-mapped matrix of transformed features.
+
+Runs pipeline[:-1].transform over the whole dataset once and saves the dense
+result next to an id -> row index (ressource/feature_matrix.*). The dashboard
+then reads a client's transformed vector zero-copy instead of re-running the
+preprocessor, and worker processes share it through the page cache.
+
+Usage:
+    python build_feature_matrix.py [--dataset data/dataset_sample.csv] [--chunksize 50000] [--dtype float32]
+"""
+
+import argparse
+
+from utils import build_feature_matrix, get_model_registry, load_feats, load_pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the transformed feature matrix")
+    parser.add_argument('--dataset', default='data/dataset_sample.csv')
+    parser.add_argument('--pipeline', default='ressource/pipeline.joblib')
+    parser.add_argument('--out', default='ressource/feature_matrix', help="Base path of the matrix files")
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float32')
+    args = parser.parse_args()
+
+    pipeline = load_pipeline(args.pipeline)
+    try:
+        feats = load_feats('ressource/feats')
+    except FileNotFoundError:
+        feats = None
+    print(f"Transforming {args.dataset} with {args.pipeline}...")
+    result = build_feature_matrix(pipeline,
+                                  dataset_path=args.dataset,
+                                  base=args.out,
+                                  feature_names=feats,
+                                  model_version=get_model_registry().version(args.pipeline),
+                                  chunksize=args.chunksize,
+                                  dtype=args.dtype,
+                                  progress=lambda rows: print(f"  {rows:,} rows transformed", end='\r'))
+    print(f"\n✓ {result['rows']:,} transformed rows saved to {args.out}.npy ({result['seconds']:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,9 @@
 import os
+import threading
 import pandas as pd
 import streamlit as st
-import numpy as np
 import warnings
 
-import plotly.express as px
 import plotly.graph_objects as go
 
 from utils import *
@@ -34,151 +33,135 @@ def custom_plotly_chart(fig, title=None, use_container_width=True):
     """Affiche un graphique Plotly directement sans encadré"""
     st.plotly_chart(fig, use_container_width=use_container_width)
 
-@st.cache_data
-def _read_df_cached(path):
-    return read_df(path)
-
-# Feature name mapping for user-friendly display
-@st.cache_data
-def get_friendly_feature_names():
-    """Map technical feature names to user-friendly labels"""
+@st.cache_resource(max_entries=1)
+def _build_client_index(dataset_key, application_key):
+    """Index the shared datasets by SK_ID_CURR (no per-session copies)"""
+    dataset = load_dataset(DATASET_PATH)
+    # Shallow copy: only the TARGET column is replaced, the other columns stay shared
+    application = load_dataset(APPLICATION_PATH).copy(deep=False)
+    application["TARGET"] = application["TARGET"].astype(str)
+    return ClientIndex(dataset=dataset, application=application)
+
+def _load_client_index():
+    """Client index of the current dataset files (rebuilt when one of them changes)"""
+    return _build_client_index(dataset_fingerprint(DATASET_PATH), dataset_fingerprint(APPLICATION_PATH))
+
+@st.cache_resource(max_entries=1)
+def _build_feature_stats(application_key):
+    """Histograms, percentiles and per-TARGET summaries of the application data"""
+    return load_feature_stats(APPLICATION_PATH, df=_load_client_index().frame('application'))
+
+def _load_feature_stats():
+    """Feature statistics of the current application file"""
+    return _build_feature_stats(dataset_fingerprint(APPLICATION_PATH))
+
+@st.cache_resource
+def _start_warm_up():
+    """
+    Warm models, explainer and LightGBM in the background when the server was
+    started without warmup.py --run (which warms this process before serving)
+    """
+    if readiness()['started_at'] is not None:
+        return None
+    thread = threading.Thread(target=warm_up, name='dashboard-warm-up', daemon=True,
+                              kwargs={'score_store_path': SCORE_STORE_PATH})
+    thread.start()
+    return thread
+
+def _scoring_context(client_id, prefetch=False):
+    """
+    One scoring context per client: the row is transformed at most once (or read
+    from the feature matrix) and shared by the gauge and SHAP views. A prefetch
+    context never calls the API and only warms the caches for the foreground
+    """
+    pipeline = load_pipeline('ressource/pipeline.joblib')
+    clf = pipeline.named_steps['classifier']
+    model_version = get_model_registry().version('ressource/pipeline.joblib')
+    url_api = os.getenv('CREDIT_SCORE_API_URL', 'https://credit-score-api-572900860091.europe-west1.run.app')
+    return ScoringContext(client_id,
+                          _load_client_index().row(client_id),
+                          pipeline,
+                          model_version=model_version,
+                          api_url=None if prefetch else url_api,
+                          cache=get_prediction_cache(),
+                          score_store=load_score_store(SCORE_STORE_PATH) if SCORE_STORE_PATH else None,
+                          feature_matrix=load_feature_matrix('ressource/feature_matrix', model_version=model_version),
+                          shap_store=load_shap_store('ressource/shap_values', model_version=model_version),
+                          explainer=lambda: load_cached_shap_explainer('ressource/shap_explainer', clf),
+                          compiled=load_compiled_pipeline('ressource/pipeline.joblib'),
+                          hedge_deadline=float(SCORING_HEDGE_DEADLINE) if SCORING_HEDGE_DEADLINE and not prefetch else None,
+                          shap_cache=get_shap_cache(),
+                          prefetch=prefetch)
+
+@st.cache_resource
+def _get_prefetcher():
+    """
+    Process-wide prefetcher warming the caches of the next clients, with the local
+    model only: no API request, nothing submitted to the foreground scoring pool,
+    and the foreground still asks the API first for a prefetched client
+    """
+    return Prefetcher(lambda client_id: _scoring_context(client_id, prefetch=True),
+                      max_concurrency=PREFETCH_THREADS,
+                      max_rss_mb=float(PREFETCH_MAX_RSS_MB) if PREFETCH_MAX_RSS_MB else None)
+
+def _start_client_work(client_id, context):
+    """Start the prediction, the SHAP values and the comparison statistics of a client in the background"""
+    executor = get_background_executor()
+    clients = _load_client_index()
+    selected_names = set(st.session_state.get('comparison_features', []))
+
+    def _comparison_stats():
+        # Box statistics by TARGET (cached per process) of the features selected in the
+        # second tab that this client has, so the tab renders them from the cache
+        if not clients.contains(client_id, 'application'):
+            return 0
+        data = clients.frame('application')
+        application_key = dataset_fingerprint(APPLICATION_PATH)
+        features = clients.row(client_id, 'application').dropna(axis=1).select_dtypes('float').columns
+        selected = [f for f in features if format_feature_name(f) in selected_names]
+        for feature in selected:
+            cached_box_stats(data, 'TARGET', feature, dataset_key=application_key)
+        return len(selected)
+
+    tasks = {
+        'prediction': lambda: context.prediction,
+        'shap': lambda: context.shap_values,
+        'comparison': _comparison_stats,
+    }
     return {
-        # Informations personnelles
-        'CNT_CHILDREN': 'Number of Children',
-        'CNT_FAM_MEMBERS': 'Family Members',
-        'DAYS_BIRTH': 'Age (days)',
-        'DAYS_EMPLOYED': 'Employment Duration (days)',
-        'DAYS_REGISTRATION': 'Registration Duration (days)',
-        'DAYS_ID_PUBLISH': 'ID Publication Date (days)',
-        'DAYS_LAST_PHONE_CHANGE': 'Phone Change Date (days)',
-        'OWN_CAR_AGE': 'Car Age (years)',
-        
-        # Financial Information
-        'AMT_INCOME_TOTAL': 'Total Income',
-        'AMT_CREDIT': 'Credit Amount',
-        'AMT_ANNUITY': 'Loan Annuity',
-        'AMT_GOODS_PRICE': 'Goods Price',
-        'REGION_POPULATION_RELATIVE': 'Regional Population (relative)',
-        
-        # External Scores
-        'EXT_SOURCE_1': 'External Score 1',
-        'EXT_SOURCE_2': 'External Score 2',
-        'EXT_SOURCE_3': 'External Score 3',
-        
-        # Building Information
-        'APARTMENTS_AVG': 'Apartments (avg)',
-        'BASEMENTAREA_AVG': 'Basement Area (avg)',
-        'YEARS_BEGINEXPLUATATION_AVG': 'Building Age (avg)',
-        'YEARS_BUILD_AVG': 'Construction Year (avg)',
-        'COMMONAREA_AVG': 'Common Area (avg)',
-        'ELEVATORS_AVG': 'Elevators (avg)',
-        'ENTRANCES_AVG': 'Entrances (avg)',
-        'FLOORSMAX_AVG': 'Max Floors (avg)',
-        'FLOORSMIN_AVG': 'Min Floors (avg)',
-        'LANDAREA_AVG': 'Land Area (avg)',
-        'LIVINGAPARTMENTS_AVG': 'Living Apartments (avg)',
-        'LIVINGAREA_AVG': 'Living Area (avg)',
-        'NONLIVINGAPARTMENTS_AVG': 'Non-living Apartments (avg)',
-        'NONLIVINGAREA_AVG': 'Non-living Area (avg)',
-        'TOTALAREA_MODE': 'Total Area (mode)',
-        
-        # Building Information (Mode)
-        'APARTMENTS_MODE': 'Apartments (mode)',
-        'BASEMENTAREA_MODE': 'Basement Area (mode)',
-        'YEARS_BEGINEXPLUATATION_MODE': 'Building Age (mode)',
-        'YEARS_BUILD_MODE': 'Construction Year (mode)',
-        'COMMONAREA_MODE': 'Common Area (mode)',
-        'ELEVATORS_MODE': 'Elevators (mode)',
-        'ENTRANCES_MODE': 'Entrances (mode)',
-        'FLOORSMAX_MODE': 'Max Floors (mode)',
-        'FLOORSMIN_MODE': 'Min Floors (mode)',
-        'LANDAREA_MODE': 'Land Area (mode)',
-        'LIVINGAPARTMENTS_MODE': 'Living Apartments (mode)',
-        'LIVINGAREA_MODE': 'Living Area (mode)',
-        'NONLIVINGAPARTMENTS_MODE': 'Non-living Apartments (mode)',
-        'NONLIVINGAREA_MODE': 'Non-living Area (mode)',
-        
-        # Building Information (Median)
-        'APARTMENTS_MEDI': 'Apartments (median)',
-        'BASEMENTAREA_MEDI': 'Basement Area (median)',
-        'YEARS_BEGINEXPLUATATION_MEDI': 'Building Age (median)',
-        'YEARS_BUILD_MEDI': 'Construction Year (median)',
-        'COMMONAREA_MEDI': 'Common Area (median)',
-        'ELEVATORS_MEDI': 'Elevators (median)',
-        'ENTRANCES_MEDI': 'Entrances (median)',
-        'FLOORSMAX_MEDI': 'Max Floors (median)',
-        'FLOORSMIN_MEDI': 'Min Floors (median)',
-        'LANDAREA_MEDI': 'Land Area (median)',
-        'LIVINGAPARTMENTS_MEDI': 'Living Apartments (median)',
-        'LIVINGAREA_MEDI': 'Living Area (median)',
-        'NONLIVINGAPARTMENTS_MEDI': 'Non-living Apartments (median)',
-        'NONLIVINGAREA_MEDI': 'Non-living Area (median)',
-        
-        # Social Circle
-        'OBS_30_CNT_SOCIAL_CIRCLE': 'Social Circle Observations (30 days)',
-        'DEF_30_CNT_SOCIAL_CIRCLE': 'Social Circle Defaults (30 days)',
-        'OBS_60_CNT_SOCIAL_CIRCLE': 'Social Circle Observations (60 days)',
-        'DEF_60_CNT_SOCIAL_CIRCLE': 'Social Circle Defaults (60 days)',
-        
-        # Credit Bureau
-        'AMT_REQ_CREDIT_BUREAU_HOUR': 'Credit Bureau Requests (last hour)',
-        'AMT_REQ_CREDIT_BUREAU_DAY': 'Credit Bureau Requests (last day)',
-        'AMT_REQ_CREDIT_BUREAU_WEEK': 'Credit Bureau Requests (last week)',
-        'AMT_REQ_CREDIT_BUREAU_MON': 'Credit Bureau Requests (last month)',
-        'AMT_REQ_CREDIT_BUREAU_QRT': 'Credit Bureau Requests (last quarter)',
-        'AMT_REQ_CREDIT_BUREAU_YEAR': 'Credit Bureau Requests (last year)',
-        
-        # Regional Ratings
-        'REGION_RATING_CLIENT': 'Regional Client Rating',
-        'REGION_RATING_CLIENT_W_CITY': 'Regional City Rating',
-        
-        # Flags
-        'REG_REGION_NOT_LIVE_REGION': 'Registration Region ≠ Living Region',
-        'REG_REGION_NOT_WORK_REGION': 'Registration Region ≠ Work Region',
-        'LIVE_REGION_NOT_WORK_REGION': 'Living Region ≠ Work Region',
-        'REG_CITY_NOT_LIVE_CITY': 'Registration City ≠ Living City',
-        'REG_CITY_NOT_WORK_CITY': 'Registration City ≠ Work City',
-        'LIVE_CITY_NOT_WORK_CITY': 'Living City ≠ Work City',
-        
-        # Documents
-        'FLAG_DOCUMENT_2': 'Document 2 Provided',
-        'FLAG_DOCUMENT_3': 'Document 3 Provided',
-        'FLAG_DOCUMENT_4': 'Document 4 Provided',
-        'FLAG_DOCUMENT_5': 'Document 5 Provided',
-        'FLAG_DOCUMENT_6': 'Document 6 Provided',
-        'FLAG_DOCUMENT_7': 'Document 7 Provided',
-        'FLAG_DOCUMENT_8': 'Document 8 Provided',
-        'FLAG_DOCUMENT_9': 'Document 9 Provided',
-        'FLAG_DOCUMENT_10': 'Document 10 Provided',
-        'FLAG_DOCUMENT_11': 'Document 11 Provided',
-        'FLAG_DOCUMENT_12': 'Document 12 Provided',
-        'FLAG_DOCUMENT_13': 'Document 13 Provided',
-        'FLAG_DOCUMENT_14': 'Document 14 Provided',
-        'FLAG_DOCUMENT_15': 'Document 15 Provided',
-        'FLAG_DOCUMENT_16': 'Document 16 Provided',
-        'FLAG_DOCUMENT_17': 'Document 17 Provided',
-        'FLAG_DOCUMENT_18': 'Document 18 Provided',
-        'FLAG_DOCUMENT_19': 'Document 19 Provided',
-        'FLAG_DOCUMENT_20': 'Document 20 Provided',
-        'FLAG_DOCUMENT_21': 'Document 21 Provided',
-        
-        # Contact Flags
-        'FLAG_MOBIL': 'Mobile Phone Provided',
-        'FLAG_EMP_PHONE': 'Work Phone Provided',
-        'FLAG_WORK_PHONE': 'Work Phone Available',
-        'FLAG_CONT_MOBILE': 'Mobile Contact Available',
-        'FLAG_PHONE': 'Home Phone Provided',
-        'FLAG_EMAIL': 'Email Provided',
-        
-        # Application Details
-        'HOUR_APPR_PROCESS_START': 'Application Hour',
-        'WEEKDAY_APPR_PROCESS_START': 'Application Weekday',
+        'client_id': client_id,
+        'context': context,
+        'tasks': tasks,
+        'futures': {name: executor.submit(task) for name, task in tasks.items()},
     }
 
-def format_feature_name(feature_name):
-    """Convert technical feature name to user-friendly label"""
-    friendly_names = get_friendly_feature_names()
-    return friendly_names.get(feature_name, feature_name)
+def _retry_failed_work(client_work):
+    """Resubmit the background tasks that ended with an error, so a rerun retries them"""
+    executor = get_background_executor()
+    for name, future in client_work['futures'].items():
+        if future.done() and not future.cancelled() and future.exception() is not None:
+            client_work['futures'][name] = executor.submit(client_work['tasks'][name])
+
+# Model features and application table of the clients (reloaded when the files change)
+DATASET_PATH = 'data/dataset_sample.csv'
+APPLICATION_PATH = 'data/application_sample.csv'
+
+# Maximum number of population points sent to the browser by the scatter view
+SCATTER_MAX_POINTS = int(os.getenv('SCATTER_MAX_POINTS', 5000))
+
+# Seconds the API answer is awaited while the local model runs; empty to disable
+SCORING_HEDGE_DEADLINE = os.getenv('SCORING_HEDGE_DEADLINE', '0.5')
+
+# Prefetch of the next clients: how many, optional work queue file (one SK_ID_CURR
+# per line, or a CSV) giving the order instead of the client list, concurrency
+# and resident memory cap in MB (empty to disable)
+PREFETCH_CLIENTS = int(os.getenv('PREFETCH_CLIENTS', 5))
+PREFETCH_QUEUE_FILE = os.getenv('PREFETCH_QUEUE_FILE', '')
+PREFETCH_THREADS = int(os.getenv('PREFETCH_THREADS', 2))
+PREFETCH_MAX_RSS_MB = os.getenv('PREFETCH_MAX_RSS_MB', '1500')
+
+# Precomputed scores (batch_score.py output), checked before the API; empty to disable
+SCORE_STORE_PATH = os.getenv('SCORE_STORE_PATH', 'data/scores.parquet')
 
 # Configuration de la page
 st.set_page_config(
@@ -309,19 +292,19 @@ placeholder = st.empty()
 placeholder_bis = st.empty()
 return_button = st.empty()
 
-df = _read_df_cached('data/dataset_sample.csv')
-df = df.replace([np.inf, -np.inf], np.nan)
+_start_warm_up()
+clients = _load_client_index()
+df = clients.frame('dataset')
 
-# Load ML models
+# Load ML models (shared by all sessions, reloaded only if the artifact changes)
 with st.spinner('⚙️ Chargement des modèles...'):
-    import joblib
-    pipeline = joblib.load('ressource/pipeline.joblib')
+    pipeline = load_pipeline('ressource/pipeline.joblib')
     preprocessor = pipeline[:-1]  # All steps except classifier
     clf = pipeline.named_steps['classifier']  # Extract classifier
 
 st.sidebar.markdown("*Choisissez un client pour commencer l'analyse*")
 
-all_clients_id = df['SK_ID_CURR'].unique()
+all_clients_id = clients.client_ids('dataset')
 
 # Initialize session state for client selection
 if 'selected_client' not in st.session_state:
@@ -329,11 +312,11 @@ if 'selected_client' not in st.session_state:
 
 client_id = st.sidebar.selectbox(
     "Sélectionnez l'identifiant d'un client",
-    options=[''] + list(all_clients_id),
+    options=[''] + all_clients_id,
     format_func=lambda x: "🔍 Choisissez un client..." if x == '' else f"Client #{int(x)}",
     label_visibility="collapsed",
     help="Sélectionnez un client dans la liste pour voir son profil de risque",
-    index=0 if st.session_state.selected_client == '' else list(all_clients_id).index(st.session_state.selected_client) + 1 if st.session_state.selected_client in all_clients_id else 0
+    index=0 if st.session_state.selected_client == '' else clients.ordinal(st.session_state.selected_client) + 1 if clients.contains(st.session_state.selected_client) else 0
 )
 
 # Update session state when user manually selects a client
@@ -506,37 +489,34 @@ if client_id == '':
     st.stop()
 
 else:
-    data_client= df[df["SK_ID_CURR"]==client_id]
-    client_index = data_client.index[0]
+    data_client = clients.row(client_id)
     
-    # Load description data for feature explanations (always available)
-    description = pd.read_csv('data/HomeCredit_columns_description.csv',
-                                encoding='ISO-8859-1',
-                                )
+    # Column descriptions for feature explanations (loaded once per process)
+    descriptions = load_column_descriptions('data/HomeCredit_columns_description.csv')
 
-    gender = data_client.loc[client_index, "CODE_GENDER"]
+    gender = clients.value(client_id, "CODE_GENDER")
     if gender == 1:
         gender = 'Homme'
     else:
         gender = 'Femme'
 
-    family_status = data_client.loc[client_index, "NAME_FAMILY_STATUS"]
-    loan_type = data_client.loc[client_index, "NAME_CONTRACT_TYPE"]
-    education = data_client.loc[client_index, "NAME_EDUCATION_TYPE"]
-    credit = data_client.loc[client_index, "AMT_CREDIT"]
-    annuity = data_client.loc[client_index, "AMT_ANNUITY"]
-    fam_members = data_client.loc[client_index, "CNT_FAM_MEMBERS"]
-    childs = data_client.loc[client_index, "CNT_CHILDREN"]
-    income_per_person = data_client.loc[client_index, "INCOME_PER_PERSON"]
-    payment_rate = data_client.loc[client_index, "PAYMENT_RATE"]
-    income_type = data_client.loc[client_index, "NAME_INCOME_TYPE"]
-    occupation_type = data_client.loc[client_index, "OCCUPATION_TYPE"]
+    family_status = clients.value(client_id, "NAME_FAMILY_STATUS")
+    loan_type = clients.value(client_id, "NAME_CONTRACT_TYPE")
+    education = clients.value(client_id, "NAME_EDUCATION_TYPE")
+    credit = clients.value(client_id, "AMT_CREDIT")
+    annuity = clients.value(client_id, "AMT_ANNUITY")
+    fam_members = clients.value(client_id, "CNT_FAM_MEMBERS")
+    childs = clients.value(client_id, "CNT_CHILDREN")
+    income_per_person = clients.value(client_id, "INCOME_PER_PERSON")
+    payment_rate = clients.value(client_id, "PAYMENT_RATE")
+    income_type = clients.value(client_id, "NAME_INCOME_TYPE")
+    occupation_type = clients.value(client_id, "OCCUPATION_TYPE")
     work = income_type
 
-    days_birth = data_client.loc[client_index, "DAYS_BIRTH"]
+    days_birth = clients.value(client_id, "DAYS_BIRTH")
     age = -int(round(days_birth/365))
     
-    days_employed = data_client.loc[client_index, "DAYS_EMPLOYED"]
+    days_employed = clients.value(client_id, "DAYS_EMPLOYED")
     try: 
         years_work = -int(round(days_employed/365))
         if years_work < 1: 
@@ -586,6 +566,20 @@ else:
     with st.sidebar:
         custom_metric("📈 Taux de Paiement", f"{payment_rate:.1%}")
     
+    # As soon as a client is selected, its prediction, SHAP values and comparison
+    # statistics are computed concurrently in the background; each view below only
+    # waits for its own piece. Reruns for the same client reuse the same results,
+    # except for the tasks that failed, which are started again.
+    client_work = st.session_state.get('client_work')
+    if client_work is None or client_work['client_id'] != client_id:
+        if client_work is not None:
+            for future in client_work['futures'].values():
+                future.cancel()
+        client_work = _start_client_work(client_id, _scoring_context(client_id))
+        st.session_state.client_work = client_work
+    else:
+        _retry_failed_work(client_work)
+
     # Système d'onglets pour l'analyse
     tab1, tab2 = st.tabs(["🎯 Risque de crédit", "📊 Analyse détaillée"])
     
@@ -593,18 +587,7 @@ else:
         # Analyse automatique avec spinner
         
         with st.spinner('🔄 Analyse du risque de crédit en cours...'):
-            X = data_client.drop(['TARGET', 'SK_ID_CURR'], axis=1)
-            y = data_client['TARGET']
-
-            # Do not transform X here — the helper will call the API first.
-            # If local fallback is used, helper will call preprocessor.transform.
-
-            url_api = os.getenv('CREDIT_SCORE_API_URL', 'https://credit-score-api-572900860091.europe-west1.run.app')
-            prob = predict_with_api_or_local(client_id,
-                                            X,
-                                            api_url=url_api,
-                                            classifier=clf,
-                                            preprocessor=preprocessor)
+            prob = client_work['futures']['prediction'].result()[0]
         
         #----------------------------------------------------------------------------------#
         #                           RESULTS DISPLAY                                        #
@@ -680,32 +663,21 @@ else:
             """)
             
             with st.spinner('Analyse des facteurs d\'influence...'):
-                feats = read_pickle('ressource/feats')
+                feats = load_feats('ressource/feats')
                 mapping = {f"Column_{i}": name for i, name in enumerate(df.columns)}
-                # Load SHAP explainer via robust utils fallback
-                SHAP_explainer = load_shap_explainer('ressource/shap_explainer', clf)
 
-                # SHAP explainer expects preprocessed input; transform X for explanation only
-                X_trans = pipeline[:-1].transform(X)
-                
-                # Get SHAP values
-                X_sample = np.array(X_trans)[0:1]
-                shap_vals = SHAP_explainer.shap_values(X_sample)
-                
-                # TreeExplainer returns a list for binary classification [class0, class1]
-                if isinstance(shap_vals, list):
-                    shap_vals_class1 = shap_vals[1][0]  # Class 1, first sample
-                else:
-                    shap_vals_class1 = shap_vals[0]  # First sample
+                # Computed in the background since the client was selected: precomputed
+                # SHAP values when available, otherwise the cached explainer on the
+                # transformed row shared with the prediction
+                shap_vals_class1 = client_work['futures']['shap'].result()
 
-                shap_explained, most_important_features = format_shap_values(shap_vals_class1, feats)
+                shap_explained, _ = format_shap_values(
+                    shap_vals_class1, feats, top=client_work['context'].shap_top_k())
                 
                 # Replace technical names with friendly names
                 shap_explained["features"] = shap_explained["features"].map(mapping).fillna(shap_explained["features"])
 
-                most_important_features = [format_feature_name(f) for f in most_important_features]
-                
-                explained_chart = plot_important_features(shap_explained, most_important_features)
+                explained_chart = plot_important_features(shap_explained)
 
             # SHAP Visualization
             custom_plotly_chart(explained_chart, "Analyse SHAP - Facteurs d'Influence")
@@ -740,20 +712,25 @@ else:
         # Display client application data analysis
         st.info("💡 Explorez et comparez les caractéristiques de ce client avec l'ensemble de la population")
             
-        data = read_df('data/application_sample.csv')
-        data["TARGET"] = data["TARGET"].astype(str)
+        data = clients.frame('application')
+        application_key = dataset_fingerprint(APPLICATION_PATH)
+        if clients.contains(client_id, 'application'):
+            data_client_app = clients.row(client_id, 'application')
+        else:
+            data_client_app = data.iloc[0:0]
 
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("**Variables principales** (sélection multiple)")
             # Get available features and create friendly mapping
-            available_features = data[data['SK_ID_CURR'] == client_id].dropna(axis=1).select_dtypes('float').columns
+            available_features = data_client_app.dropna(axis=1).select_dtypes('float').columns
             feature_options = {format_feature_name(f): f for f in available_features}
             
             selected_friendly = st.multiselect(
                 'Choisissez les variables à analyser :',
                 options=list(feature_options.keys()),
+                key='comparison_features',
                 help="Sélectionnez une ou plusieurs variables numériques à visualiser"
             )
             # Convert back to technical names for processing
@@ -761,7 +738,7 @@ else:
         
         with col2:
             st.markdown("**Variable secondaire** (optionnel)")
-            all_features = data[data['SK_ID_CURR'] == client_id].dropna(axis=1).columns
+            all_features = data_client_app.dropna(axis=1).columns
             all_feature_options = {format_feature_name(f): f for f in all_features}
             
             selected_friendly_2 = st.selectbox(
@@ -784,25 +761,26 @@ else:
                 
                 
                 with st.container():
-                    data_client_value = data.loc[data['SK_ID_CURR'] == client_id, features].values
-                    data_client_target = data.loc[data['SK_ID_CURR'] == client_id, 'TARGET'].values
-
-                    # Generate distribution data
-                    hist, edges = np.histogram(data.loc[:, features].dropna(), bins=20)
-                    hist_source_df = pd.DataFrame({"edges_left": edges[:-1], "edges_right": edges[1:], "hist":hist})
-                    max_histogram = hist_source_df["hist"].max()
+                    data_client_value = data_client_app[features].values
+                    data_client_target = data_client_app['TARGET'].values
+
+                    # Precomputed distribution data (no pass over the population)
+                    feature_stats = _load_feature_stats()
+                    hist_source = feature_stats.histogram(features, bins=20)
+                    max_histogram = max(hist_source["hist"])
+                    client_percentile = feature_stats.percentile(features, data_client_value[0])
                     client_line = pd.DataFrame({"x": [data_client_value, data_client_value],
                                                 "y": [0, max_histogram]})
-                    hist_source = hist_source_df.to_dict('list')
 
                     # Display in columns
                     col1, col2 = st.columns(2)
                     with col1:
-                        plot = plot_feature_distrib(friendly_name, client_line, hist_source, data_client_value, max_histogram)
+                        plot = plot_feature_distrib(friendly_name, client_line, hist_source, data_client_value, max_histogram,
+                                                    client_percentile=client_percentile)
                         custom_plotly_chart(plot, f"Distribution - {friendly_name}")
                     with col2:
-                        fig = px.box(data, x='TARGET', y=features, points="outliers", color='TARGET', height=580)
-                        fig.update_traces(quartilemethod="inclusive")
+                        # Quartiles/whiskers computed server side, only summaries sent to the browser
+                        fig = plot_box_comparison(data, 'TARGET', features, height=580, dataset_key=application_key)
                         fig.add_trace(go.Scatter(x=data_client_target,
                                                 y=data_client_value,
                                                 mode='markers',
@@ -822,29 +800,34 @@ else:
                             <h4 style='color: white; margin: 0;'>{friendly_name}</h4>
                             <p style='color: white; margin: 5px 0 0 0; opacity: 0.9; font-size: 0.85em;'>
                                 Technical name: {features}<br>
-                                {description.loc[description['Row'] == features, 'Description'].values[0] if len(description.loc[description['Row'] == features, 'Description'].values) > 0 else ''}
+                                {descriptions.get(features, '')}
                             </p>
                         </div>
                     """, unsafe_allow_html=True)
                     st.divider()
         elif selected_features and selected_features_2 != "Choose a variable...": 
             with graph_place.container():
+                if selected_features_2 in data.select_dtypes('float').columns.to_list():
+                    scatter_mode = st.radio("Affichage du nuage de points",
+                                            ['Points', 'Densité'],
+                                            horizontal=True,
+                                            help=f"Au-delà de {SCATTER_MAX_POINTS:,} clients, les points sont échantillonnés par statut")
                 for features in selected_features:
                     # Get friendly names
                     friendly_name_1 = format_feature_name(features)
                     friendly_name_2 = format_feature_name(selected_features_2)
                     
                     if selected_features_2 in data.select_dtypes('float').columns.to_list():
-                        data_client_value_1 = data.loc[data['SK_ID_CURR'] == client_id, features].values
-                        data_client_value_2 = data.loc[data['SK_ID_CURR'] == client_id, selected_features_2].values
+                        data_client_value_1 = data_client_app[features].values
+                        data_client_value_2 = data_client_app[selected_features_2].values
                         
-                        # Create scatter plot
-                        fig = px.scatter(data, x=features, y=selected_features_2, color='TARGET', height=580, opacity=.3)
-                        fig.add_trace(go.Scattergl(x=data_client_value_1,
-                                                y=data_client_value_2,
-                                                mode='markers',
-                                                marker=dict(size=10, color = 'red'),
-                                                name='client'))
+                        # Create scatter plot (downsampled by TARGET or binned server side)
+                        fig, n_points = plot_scatter_comparison(data, features, selected_features_2, color='TARGET',
+                                                                client_x=data_client_value_1,
+                                                                client_y=data_client_value_2,
+                                                                max_points=SCATTER_MAX_POINTS,
+                                                                mode='density' if scatter_mode == 'Densité' else 'auto',
+                                                                height=580)
                         fig.update_layout(
                             legend=dict(yanchor="top", y=1, xanchor="left", x=1),
                             xaxis_title=friendly_name_1,
@@ -852,14 +835,18 @@ else:
                         )
                         
                         custom_plotly_chart(fig, f"Corrélation : {friendly_name_1} vs {friendly_name_2}")
+                        if scatter_mode == 'Densité':
+                            st.caption(f"{n_points:,} cellules non vides ({len(data):,} clients)")
+                        else:
+                            st.caption(f"{n_points:,} points affichés sur {len(data):,} clients")
                         st.divider()
                     else:
-                        data_client_value_1 = data.loc[data['SK_ID_CURR'] == client_id, features].values
-                        data_client_value_2 = data.loc[data['SK_ID_CURR'] == client_id, selected_features_2].values
+                        data_client_value_1 = data_client_app[features].values
+                        data_client_value_2 = data_client_app[selected_features_2].values
                         
                         # Create box plot
-                        fig = px.box(data, x=selected_features_2, y=features, points="outliers", color=selected_features_2, height=580)
-                        fig.update_traces(quartilemethod="inclusive")
+                        fig = plot_box_comparison(data, selected_features_2, features, height=580,
+                                                  dataset_key=application_key)
                         fig.add_trace(go.Scatter(x=data_client_value_2,
                                                 y=data_client_value_1,
                                                 mode='markers',
@@ -872,4 +859,15 @@ else:
                         )
                         
                         custom_plotly_chart(fig, f"Analyse par Catégorie : {friendly_name_1} par {friendly_name_2}")
-                        st.divider()
\ No newline at end of file
+                        st.divider()
+
+    # Client displayed: warm the caches of the next clients of the list (or of the
+    # work queue) in the background, within the prefetcher's concurrency/memory limits
+    if PREFETCH_CLIENTS > 0 and st.session_state.get('prefetched_for') != client_id:
+        if PREFETCH_QUEUE_FILE and os.path.exists(PREFETCH_QUEUE_FILE):
+            next_ids = next_client_ids(client_id, load_work_queue(PREFETCH_QUEUE_FILE), PREFETCH_CLIENTS)
+        else:
+            start = clients.ordinal(client_id) + 1
+            next_ids = all_clients_id[start:start + PREFETCH_CLIENTS]
+        _get_prefetcher().schedule([i for i in next_ids if clients.contains(i)])
+        st.session_state.prefetched_for = client_id
@@ -1,8 +1,13 @@
 """
 Script to recreate SHAP explainer compatible with current libraries
 Based on the original notebook methodology
+
+With --precompute, also computes the TreeExplainer SHAP values of the whole
+dataset in chunks and stores them as a float32 memory-mapped matrix indexed by
+SK_ID_CURR (ressource/shap_values.*), with the top-k features of each client.
 """
 
+import argparse
 import numpy as np
 import pandas as pd
 import joblib
@@ -10,6 +15,13 @@ import pickle
 import shap
 from sklearn.model_selection import train_test_split
 
+parser = argparse.ArgumentParser(description="Recreate the SHAP explainer")
+parser.add_argument('--precompute', action='store_true',
+                    help="Also precompute SHAP values for every client (ressource/shap_values.*)")
+parser.add_argument('--chunksize', type=int, default=10000, help="Rows explained per batch")
+parser.add_argument('--top-k', type=int, default=15, help="Top features stored per client")
+args = parser.parse_args()
+
 print("Loading model artifacts...")
 
 
@@ -117,7 +129,11 @@ print("\nSaving SHAP explainer...")
 with open('ressource/shap_explainer_new', 'wb') as file:
     pickle.dump(SHAP_explainer, file)
 
-print("✓ SHAP explainer saved to ressource/shap_explainer_new")
+from utils import get_model_registry, write_explainer_stamp
+
+write_explainer_stamp('ressource/shap_explainer_new',
+                      model_version=get_model_registry().version('ressource/pipeline.joblib'))
+print("✓ SHAP explainer saved to ressource/shap_explainer_new (stamped with shap/lightgbm versions)")
 
 # Test loading it back
 print("\nTesting reload...")
@@ -126,3 +142,22 @@ with open('ressource/shap_explainer_new', 'rb') as file:
 print(f"Successfully reloaded: {type(test_explainer)}")
 
 print("\nSHAP explainer recreation complete!")
+
+if args.precompute:
+    if not isinstance(SHAP_explainer, shap.TreeExplainer):
+        print("\nSkipping SHAP precomputation: only supported with TreeExplainer")
+    else:
+        from utils import build_shap_store
+
+        print("\nPrecomputing SHAP values for the whole dataset...")
+        result = build_shap_store(SHAP_explainer,
+                                  pipeline,
+                                  dataset_path='data/dataset_sample.csv',
+                                  base='ressource/shap_values',
+                                  feature_names=feats,
+                                  model_version=get_model_registry().version('ressource/pipeline.joblib'),
+                                  chunksize=args.chunksize,
+                                  k=args.top_k,
+                                  progress=lambda rows: print(f"  {rows:,} rows explained", end='\r'))
+        print(f"\n✓ SHAP values of {result['rows']:,} clients saved to ressource/shap_values.npy "
+              f"({result['seconds']:.1f}s)")
@@ -0,0 +1,81 @@
+"""
+Import-time profile of the dashboard modules (cold-start tracking).
+
+Imports the target modules in a fresh interpreter with `python -X importtime`
+and reports the cumulative import time per top-level package, so cold-start
+regressions can be tracked in CI.
+
+Usage:
+    python startup_profile.py [module ...] [--top 15] [--json report.json] [--budget-ms 1500]
+
+Exits with status 1 when the total import time exceeds --budget-ms.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+
+def profile_imports(modules):
+    """
+    Import modules in a fresh interpreter and parse its -X importtime output.
+
+    Returns:
+        (total_us, per_package) where per_package maps each top-level package
+        to the sum of the self import times of its modules, in microseconds.
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {modules} failed:\n{result.stderr[-2000:]}")
+
+    per_package = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        if 'imported package' in name:
+            continue
+        # Attribute each module's own (self) time to its top-level package:
+        # pandas.core.frame counts for pandas, utils for utils, etc.
+        package = name.strip().split('.')[0]
+        per_package[package] = per_package.get(package, 0) + int(self_us)
+        total_us += int(self_us)
+    return total_us, per_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown of the dashboard modules")
+    parser.add_argument('modules', nargs='*', default=['utils'], help="Modules to import (default: utils)")
+    parser.add_argument('--top', type=int, default=15, help="Number of packages to display")
+    parser.add_argument('--json', dest='json_path', help="Write the full report to this JSON file")
+    parser.add_argument('--budget-ms', type=float, help="Fail if the total import time exceeds this budget")
+    args = parser.parse_args()
+
+    total_us, per_package = profile_imports(args.modules)
+    ranking = sorted(per_package.items(), key=lambda item: item[1], reverse=True)
+
+    print(f"Import time of {', '.join(args.modules)}: {total_us / 1000:.0f} ms")
+    print(f"{'package':<30}{'ms':>10}{'share':>10}")
+    for package, us in ranking[:args.top]:
+        print(f"{package:<30}{us / 1000:>10.1f}{us / total_us:>10.1%}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                'modules': args.modules,
+                'total_ms': total_us / 1000,
+                'packages_ms': {package: us / 1000 for package, us in ranking},
+            }, f, indent=2)
+        print(f"✓ Report saved to {args.json_path}")
+
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        print(f"✗ Import time {total_us / 1000:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Prefetched clients are still scored by the API when they are selected.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import PredictionCache, Prefetcher, ScoringContext  # noqa: E402
+
+API_SCORE = 0.99
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """POST /predict -> {"credit_score": API_SCORE}, counting the requested ids."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.requested.append(json.loads(self.rfile.read(length))['id'])
+        body = json.dumps({'credit_score': API_SCORE, 'advice': 'Payment difficulties'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+    server.requested = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clients():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(200, 4)), columns=['A', 'B', 'C', 'D'])
+    df.insert(0, 'SK_ID_CURR', np.arange(100000, 100200))
+    target = (df['A'] + rng.normal(size=200) > 0).astype(int)
+    pipeline = Pipeline([('scaler', StandardScaler()), ('classifier', LogisticRegression())])
+    pipeline.fit(df.drop(columns='SK_ID_CURR'), target)
+    return df, pipeline
+
+
+class ZeroExplainer:
+    """Stands for the SHAP explainer: the prefetch also computes the SHAP values."""
+
+    def shap_values(self, X):
+        return np.zeros_like(X)
+
+
+def _context(clients, client_id, cache, api_url=None, **kwargs):
+    df, pipeline = clients
+    return ScoringContext(client_id, df[df['SK_ID_CURR'] == client_id], pipeline, model_version='v1',
+                          api_url=api_url, cache=cache, explainer=ZeroExplainer(), **kwargs)
+
+
+def _prefetch(clients, cache, client_ids):
+    prefetcher = Prefetcher(lambda client_id: _context(clients, client_id, cache, prefetch=True))
+    prefetcher.schedule(client_ids)
+    deadline = time.monotonic() + 10
+    while prefetcher.stats()['workers'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert prefetcher.stats()['warmed'] == len(client_ids)
+
+
+@pytest.mark.parametrize('hedge_deadline', [None, 0.5])
+def test_prefetched_client_is_scored_by_the_api(stub_api, clients, hedge_deadline):
+    cache = PredictionCache()
+    _prefetch(clients, cache, [100012])
+    assert stub_api.requested == []
+
+    api_url = f"http://127.0.0.1:{stub_api.server_address[1]}"
+    context = _context(clients, 100012, cache, api_url=api_url, hedge_deadline=hedge_deadline)
+    assert context.prediction == (API_SCORE, 'api')
+    assert stub_api.requested == [100012]
+
+
+def test_prefetched_score_is_the_local_fallback(clients):
+    cache = PredictionCache()
+    _prefetch(clients, cache, [100012])
+    prefetched = cache.lookup(100012, 'v1', sources=(cache.PREFETCH,))[0]
+
+    # Nothing listens on this port: the API fails and the prefetched local score answers
+    context = _context(clients, 100012, cache, api_url='http://127.0.0.1:9')
+    assert context.prediction == (prefetched, 'local')
+    assert cache.lookup(100012, 'v1') == (prefetched, 'local')
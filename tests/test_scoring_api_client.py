@@ -0,0 +1,129 @@
+"""
+ScoringApiClient against a local stub of the credit score API.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import CircuitOpenError, ScoringApiClient  # noqa: E402
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """POST /predict -> {"credit_score": 0.25}, or the status set on the server."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        json.loads(self.rfile.read(length))
+        self.server.requests += 1
+        self.server.client_ports.add(self.client_address[1])
+        if self.server.status == 200:
+            body = json.dumps({'credit_score': 0.25, 'advice': 'No payment difficulties'}).encode()
+        else:
+            body = b'{}'
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubApiHandler)
+    server.status = 200
+    server.requests = 0
+    server.client_ports = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, **kwargs):
+    return ScoringApiClient(f"http://127.0.0.1:{server.server_address[1]}", timeout=2, **kwargs)
+
+
+def test_connection_is_reused(stub_api):
+    client = _client(stub_api)
+    for client_id in range(5):
+        assert client.predict(100000 + client_id) == 0.25
+    assert stub_api.requests == 5
+    assert len(stub_api.client_ports) == 1
+    stats = client.stats()
+    assert stats['successes'] == 5 and stats['success_rate'] == 1.0
+    client.close()
+
+
+def test_breaker_opens_after_consecutive_failures(stub_api):
+    stub_api.status = 500
+    client = _client(stub_api, failure_threshold=3, cooldown=60)
+    for _ in range(3):
+        with pytest.raises(Exception):
+            client.predict(100002)
+    assert client.state == 'open'
+
+    # While open, the API is not called at all
+    with pytest.raises(CircuitOpenError):
+        client.predict(100002)
+    assert stub_api.requests == 3
+    assert client.stats()['short_circuited'] == 1
+    client.close()
+
+
+def test_half_open_trial_closes_or_reopens_the_breaker(stub_api):
+    stub_api.status = 500
+    client = _client(stub_api, failure_threshold=2, cooldown=0.2)
+    for _ in range(2):
+        with pytest.raises(Exception):
+            client.predict(100002)
+    time.sleep(0.25)
+    assert client.state == 'half-open'
+
+    # A failed trial request opens the breaker again
+    with pytest.raises(Exception):
+        client.predict(100002)
+    assert client.state == 'open'
+
+    # A successful trial request after the cooldown closes it
+    time.sleep(0.25)
+    stub_api.status = 200
+    assert client.predict(100002) == 0.25
+    assert client.state == 'closed'
+    assert client.predict(100003) == 0.25
+    client.close()
+
+
+def test_connect_attempts_fit_in_the_timeout():
+    client = ScoringApiClient('http://127.0.0.1:9', timeout=5, retries=2)
+    connect, read = client.timeouts()
+    assert read == 5
+    assert connect * (1 + client.retries) <= 5
+    assert client.timeouts(0.6) == (pytest.approx(0.2), 0.6)
+    assert ScoringApiClient('http://127.0.0.1:9', connect_timeout=0.5).timeouts(3) == (0.5, 3)
+
+
+def test_unreachable_api_fails_within_the_timeout():
+    # Nothing listens on this port: every connection attempt is refused
+    client = ScoringApiClient('http://127.0.0.1:9', timeout=2, retries=2, backoff_factor=0.01)
+    start = time.perf_counter()
+    with pytest.raises(Exception):
+        client.predict(100002)
+    assert time.perf_counter() - start < 2
+    client.close()
@@ -1,158 +1,2473 @@
 import os
+import json
 import pickle
-import dill
-import joblib
+import hashlib
+import logging
+import threading
+import time
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import shap
-shap.initjs()
 
+# Heavy dependencies (dill, joblib, shap, plotly, requests, pyarrow) are imported
+# inside the functions that need them, so importing utils stays fast on cold start.
 
-def read_df(path):
-    """Read a CSV into a DataFrame with consistent encoding and replacements."""
-    return pd.read_csv(path, encoding='ISO-8859-1')
+logger = logging.getLogger(__name__)
 
 
-def read_pickle(path):
+COLUMNAR_FORMATS = ('parquet', 'feather')
+
+
+def columnar_path(path, fmt='parquet'):
+    """Return the columnar sibling of a CSV path (data/x.csv -> data/x.parquet)."""
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported columnar format: {fmt}")
+    return f"{os.path.splitext(path)[0]}.{fmt}"
+
+
+def find_columnar_file(path):
+    """
+    Return the columnar copy of a CSV if one exists and is not older than the CSV.
+
+    Parquet is preferred over Feather. Returns None when only the CSV is usable.
+    """
+    csv_mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    for fmt in COLUMNAR_FORMATS:
+        candidate = columnar_path(path, fmt)
+        if os.path.exists(candidate) and (csv_mtime is None or os.path.getmtime(candidate) >= csv_mtime):
+            return candidate
+    return None
+
+
+def optimize_dtypes(df, category_threshold=0.5):
+    """
+    Shrink a DataFrame in place before writing it to a columnar file.
+
+    - +/-inf are replaced by NaN in float columns
+    - integer columns are downcast to the smallest integer type
+    - float columns are downcast to float32 only when the conversion is lossless
+    - string columns with few distinct values become categoricals
+
+    Returns the same DataFrame.
+    """
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype='float64', copy=True)
+            values[np.isinf(values)] = np.nan
+            as_float32 = values.astype('float32')
+            if np.array_equal(as_float32.astype('float64'), values, equal_nan=True):
+                df[col] = as_float32
+            else:
+                df[col] = values
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if len(series) and series.nunique(dropna=True) / len(series) < category_threshold:
+                df[col] = series.astype('category')
+    return df
+
+
+def convert_to_columnar(path, fmt='parquet', out_path=None):
+    """
+    Convert a CSV dataset to a typed Parquet/Feather file next to it.
+
+    Args:
+        path: CSV file to convert.
+        fmt: 'parquet' or 'feather'.
+        out_path: Destination; defaults to the CSV path with the format extension.
+
+    Returns:
+        (out_path, shape) of the written dataset.
+    """
+    out_path = out_path or columnar_path(path, fmt)
+    df = optimize_dtypes(pd.read_csv(path, encoding='ISO-8859-1', low_memory=False))
+    tmp_path = f"{out_path}.tmp"
+    if fmt == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_feather(tmp_path)
+    os.replace(tmp_path, out_path)
+    return out_path, df.shape
+
+
+def read_df(path, columns=None):
+    """
+    Read a dataset into a DataFrame with consistent encoding and replacements.
+
+    When an up-to-date Parquet/Feather copy of the CSV exists (see
+    convert_to_columnar), it is read instead. Only the requested columns are
+    loaded when columns is given.
+    """
+    columnar = find_columnar_file(path)
+    if columnar is not None:
+        if columnar.endswith('.parquet'):
+            return pd.read_parquet(columnar, columns=columns)
+        return pd.read_feather(columnar, columns=columns)
+    return pd.read_csv(path, encoding='ISO-8859-1', usecols=columns)
+
+
+def replace_inf_inplace(df):
+    """Replace +/-inf by NaN in the float columns of df without copying the frame."""
+    for col in df.columns:
+        if not pd.api.types.is_float_dtype(df[col]):
+            continue
+        values = df[col].to_numpy()
+        mask = np.isinf(values)
+        if not mask.any():
+            continue
+        if values.flags.writeable:
+            values[mask] = np.nan
+        else:
+            df[col] = np.where(mask, np.nan, values)
+    return df
+
+
+def dataset_fingerprint(path):
+    """
+    Stable identity of a dataset as read by load_dataset: (path, file read,
+    mtime_ns, size), the file read being the columnar copy if any.
+    """
+    return (path,) + _MODEL_REGISTRY.fingerprint(find_columnar_file(path) or path, content_hash=False)[:3]
+
+
+def load_dataset(path, columns=None):
+    """
+    Shared, cleaned DataFrame of a dataset, loaded once per process.
+
+    +/-inf are replaced by NaN in place at load time (columnar copies are
+    already clean, see optimize_dtypes). Every caller gets the same object:
+    treat it as read-only and work on views (iloc, column selection) instead
+    of copies. The dataset is reloaded when the file actually read (the
+    columnar copy if any, else the CSV) changes; it is identified by its
+    mtime and size, without hashing its content.
+    """
+    name = f"dataset:{path}:{','.join(columns)}" if columns else f"dataset:{path}"
+    return _MODEL_REGISTRY.get(path, loader=lambda p: replace_inf_inplace(read_df(p, columns=columns)), name=name,
+                               fingerprint_path=find_columnar_file(path) or path, content_hash=False)
+
+
+class ClientIndex:
+    """
+    Constant-time client lookup by SK_ID_CURR across several datasets.
+
+    Built once when the datasets are loaded: each named frame gets an
+    id -> row position map (first occurrence wins), so fetching a client's row
+    or a single value never scans the id column.
+
+    Example:
+        clients = ClientIndex(dataset=df, application=data)
+        clients.value(client_id, 'AMT_CREDIT')
+        clients.row(client_id, frame='application')
+    """
+
+    def __init__(self, id_column='SK_ID_CURR', **frames):
+        self.id_column = id_column
+        self._frames = {}
+        self._positions = {}
+        self._columns = {}
+        self._ordinals = {}
+        for name, frame in frames.items():
+            self.add(name, frame)
+
+    def add(self, name, frame):
+        """Index (or re-index) a DataFrame under the given name."""
+        ids = frame[self.id_column].tolist()
+        positions = {}
+        for pos, client_id in enumerate(ids):
+            positions.setdefault(client_id, pos)
+        self._frames[name] = frame
+        self._positions[name] = positions
+        self._columns[name] = {col: i for i, col in enumerate(frame.columns)}
+        self._ordinals[name] = {client_id: i for i, client_id in enumerate(positions)}
+
+    def frame(self, name='dataset'):
+        """Return the indexed DataFrame."""
+        return self._frames[name]
+
+    def client_ids(self, name='dataset'):
+        """Unique client ids of a frame, in order of first appearance."""
+        return list(self._ordinals[name])
+
+    def contains(self, client_id, frame='dataset'):
+        return client_id in self._positions[frame]
+
+    def position(self, client_id, frame='dataset'):
+        """Row position of a client, or KeyError if unknown."""
+        try:
+            return self._positions[frame][client_id]
+        except KeyError:
+            raise KeyError(f"Client {client_id} not found in '{frame}'") from None
+
+    def ordinal(self, client_id, frame='dataset'):
+        """Position of a client among the unique ids (e.g. a selectbox index)."""
+        try:
+            return self._ordinals[frame][client_id]
+        except KeyError:
+            raise KeyError(f"Client {client_id} not found in '{frame}'") from None
+
+    def row(self, client_id, frame='dataset'):
+        """Return the client's row as a one-row DataFrame."""
+        pos = self.position(client_id, frame)
+        return self._frames[frame].iloc[pos:pos + 1]
+
+    def value(self, client_id, column, frame='dataset'):
+        """Return a single value for a client without materializing the row."""
+        pos = self.position(client_id, frame)
+        return self._frames[frame].iat[pos, self._columns[frame][column]]
+
+
+def feature_stats_path(path):
+    """Return the stats sidecar of a dataset (data/x.csv -> data/x.stats.json)."""
+    return f"{os.path.splitext(path)[0]}.stats.json"
+
+
+class FeatureStats:
+    """
+    Precomputed distribution statistics for every numeric column of a dataset.
+
+    For each column it keeps histograms (one per configured bin count), a
+    percentile grid (0 to 100) and per-TARGET summaries, so the distribution view
+    never has to scan the population again. Serialized as JSON next to the data.
+    """
+
+    def __init__(self, columns, bins=(20,), target='TARGET'):
+        self.columns = columns
+        self.bins = tuple(bins)
+        self.target = target
+
+    @classmethod
+    def build(cls, df, bins=(20,), n_quantiles=101, target='TARGET', id_column='SK_ID_CURR'):
+        """
+        Compute the statistics of all numeric columns of df (one pass per column).
+
+        Args:
+            df: Source DataFrame.
+            bins: Histogram bin counts to precompute.
+            n_quantiles: Size of the evenly spaced percentile grid.
+            target: Column used to split per-class summaries (skipped if absent).
+            id_column: Identifier column excluded from the statistics.
+        """
+        bins = tuple(int(b) for b in bins)
+        levels = np.linspace(0, 1, n_quantiles)
+        numeric = [c for c in df.select_dtypes('number').columns if c not in (id_column, target)]
+        has_target = target in df.columns
+
+        by_target = {}
+        if has_target and numeric:
+            grouped = df[numeric].replace([np.inf, -np.inf], np.nan).groupby(df[target].astype(str))
+            summary = grouped.describe()
+            for label in summary.index:
+                by_target[label] = summary.loc[label]
+
+        columns = {}
+        for col in numeric:
+            values = df[col].to_numpy(dtype='float64')
+            values = values[np.isfinite(values)]
+            if values.size == 0:
+                continue
+            histograms = {}
+            for n_bins in bins:
+                hist, edges = np.histogram(values, bins=n_bins)
+                histograms[str(n_bins)] = {'hist': hist.tolist(), 'edges': edges.tolist()}
+            entry = {
+                'count': int(values.size),
+                'histograms': histograms,
+                'quantiles': np.quantile(values, levels).tolist(),
+            }
+            if by_target:
+                entry['by_target'] = {
+                    label: {
+                        stat: (None if pd.isna(summary[(col, stat)]) else float(summary[(col, stat)]))
+                        for stat in ('count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max')
+                    }
+                    for label, summary in by_target.items()
+                }
+            columns[col] = entry
+        return cls(columns, bins=bins, target=target)
+
+    def save(self, path):
+        """Write the statistics as JSON (atomically)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'bins': list(self.bins), 'target': self.target, 'columns': self.columns}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            content = json.load(f)
+        return cls(content['columns'], bins=content['bins'], target=content.get('target', 'TARGET'))
+
+    def __contains__(self, feature):
+        return feature in self.columns
+
+    def histogram(self, feature, bins=None):
+        """
+        Return the histogram of a feature in the format used by plot_feature_distrib.
+
+        Returns:
+            dict with 'edges_left', 'edges_right' and 'hist' lists.
+        """
+        bins = bins or self.bins[0]
+        hist = self.columns[feature]['histograms'].get(str(bins))
+        if hist is None:
+            raise KeyError(f"No {bins}-bin histogram precomputed for {feature} (available: {self.bins})")
+        edges = hist['edges']
+        return {'edges_left': edges[:-1], 'edges_right': edges[1:], 'hist': hist['hist']}
+
+    def percentile(self, feature, value):
+        """Percentile (0-100) of value within the population of a feature."""
+        if value is None or not np.isfinite(value):
+            return None
+        quantiles = np.asarray(self.columns[feature]['quantiles'])
+        levels = np.linspace(0, 100, len(quantiles))
+        # Average the left/right interpolations so flat regions (ties) map to their midpoint
+        left = np.interp(value, quantiles, levels)
+        right = 100 - np.interp(-value, -quantiles[::-1], levels)
+        return float((left + right) / 2)
+
+    def target_summary(self, feature):
+        """Per-TARGET count/mean/std/min/quartiles/max of a feature."""
+        return self.columns[feature].get('by_target', {})
+
+
+def load_feature_stats(path, df=None, bins=(20,), save=True):
+    """
+    Load the statistics sidecar of a dataset, rebuilding it if missing or stale.
+
+    Args:
+        path: Dataset path (CSV); the sidecar lives next to it.
+        df: Already loaded DataFrame to build from (read with read_df otherwise).
+        bins: Histogram bin counts required; triggers a rebuild if any is missing.
+        save: Persist a rebuilt sidecar (best effort).
+    """
+    stats_path = feature_stats_path(path)
+    sources = [p for p in (path, find_columnar_file(path)) if p and os.path.exists(p)]
+    source_mtime = max((os.path.getmtime(p) for p in sources), default=0)
+    if os.path.exists(stats_path) and os.path.getmtime(stats_path) >= source_mtime:
+        stats = FeatureStats.load(stats_path)
+        if set(bins) <= set(stats.bins):
+            return stats
+    stats = FeatureStats.build(read_df(path) if df is None else df, bins=bins)
+    if save:
+        try:
+            stats.save(stats_path)
+        except OSError:
+            pass
+    return stats
+
+
+def resolve_artifact_path(path):
+    """
+    Resolve an artifact path given with or without extension.
+
+    Returns the first existing candidate among path, path.pkl, path.pickle and
+    path.joblib, or None when none of them exists.
+    """
+    if os.path.exists(path):
+        return path
+    for ext in ('.pkl', '.pickle', '.joblib'):
+        candidate = f"{path}{ext}"
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+ARTIFACT_MANIFEST = 'manifest.json'
+_MANIFEST_LOCK = threading.Lock()
+_MANIFEST_LIBRARIES = ('dill', 'joblib', 'numpy', 'scikit-learn', 'lightgbm', 'shap')
+
+
+def _load_dill(path, mmap_mode=None):
+    import dill
+
+    with open(path, 'rb') as f:
+        return dill.load(f)
+
+
+def _load_pickle(path, mmap_mode=None):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _load_joblib(path, mmap_mode=None):
+    import joblib
+
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+ARTIFACT_LOADERS = {'dill': _load_dill, 'pickle': _load_pickle, 'joblib': _load_joblib}
+
+
+def library_versions(libraries=_MANIFEST_LIBRARIES):
+    """Installed versions of the given distributions (None if missing), without importing them."""
+    from importlib import metadata
+
+    versions = {}
+    for library in libraries:
+        try:
+            versions[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            versions[library] = None
+    return versions
+
+
+def artifact_manifest_path(path):
+    """Path of the manifest describing the artifacts of path's directory."""
+    return os.path.join(os.path.dirname(path) or '.', ARTIFACT_MANIFEST)
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def artifact_manifest_entry(path):
+    """
+    Return the manifest entry of an artifact file, or None when it is missing
+    or does not describe the current file.
+
+    The entry is trusted when size and mtime match; when only the mtime changed
+    (e.g. fresh checkout), the SHA-256 decides and the entry is refreshed.
+    """
+    entry = _read_manifest(artifact_manifest_path(path)).get(os.path.basename(path))
+    if entry is None:
+        return None
+    stat = os.stat(path)
+    if entry.get('size') != stat.st_size:
+        return None
+    if entry.get('mtime_ns') != stat.st_mtime_ns:
+        if entry.get('sha256') != file_checksum(path):
+            return None
+        entry = record_artifact(path, entry['loader'], checksum=entry['sha256'])
+    return entry
+
+
+def record_artifact(path, loader, checksum=None):
+    """
+    Write (or refresh) the manifest entry of an artifact file: format, loader,
+    size, mtime, SHA-256 and the library versions it was loaded with.
+
+    The manifest is replaced atomically; write failures (read-only image) are
+    ignored since the manifest is only an accelerator.
+
+    Returns:
+        The entry.
+    """
+    stat = os.stat(path)
+    entry = {
+        'format': os.path.splitext(path)[1].lstrip('.') or 'pickle',
+        'loader': loader,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': checksum or file_checksum(path),
+        'versions': library_versions(),
+        'recorded_at': time.time(),
+    }
+    manifest_path = artifact_manifest_path(path)
+    with _MANIFEST_LOCK:
+        manifest = _read_manifest(manifest_path)
+        manifest[os.path.basename(path)] = entry
+        try:
+            _write_json_atomic(manifest_path, manifest)
+        except OSError:
+            pass
+    return entry
+
+
+def read_pickle(path, mmap_mode=None):
     """
     Load a serialized Python object from disk.
 
-    - Accepts a path with or without extension
-    - Tries common extensions: .pkl, .pickle, .joblib
-    - Tries loaders in order: dill -> pickle -> joblib
+    - Accepts a path with or without extension
+    - Tries common extensions: .pkl, .pickle, .joblib
+    - Uses the loader recorded in the artifact manifest when it describes the file
+    - Otherwise tries loaders in order: dill -> pickle -> joblib, and records the
+      one that worked in the manifest for the next load
+
+    Args:
+        path: Artifact path (with or without extension).
+        mmap_mode: Passed to joblib.load (e.g. 'r') to memory-map the NumPy
+            arrays of large artifacts instead of reading them into memory.
+            joblib is then tried first.
+
+    This makes it robust to artifacts saved with either pickle/dill or joblib.
+    """
+    # Resolve actual path: if given path doesn't exist, try common extensions.
+    resolved_path = resolve_artifact_path(path)
+    if resolved_path is None:
+        raise FileNotFoundError(f"Pickle path not found: {path}")
+
+    errors = []
+    entry = artifact_manifest_entry(resolved_path)
+    if entry is not None and entry.get('loader') in ARTIFACT_LOADERS:
+        try:
+            return ARTIFACT_LOADERS[entry['loader']](resolved_path, mmap_mode=mmap_mode)
+        except Exception as e:
+            errors.append(f"{entry['loader']} (manifest): {e}")
+
+    # Attempt to load with dill, then pickle, then joblib
+    # Note: joblib can load many pickle files, but we keep it last to allow dill-specific objects first
+    order = ['dill', 'pickle', 'joblib']
+    if mmap_mode is not None:
+        order = ['joblib', 'dill', 'pickle']
+    for loader in order:
+        try:
+            obj = ARTIFACT_LOADERS[loader](resolved_path, mmap_mode=mmap_mode)
+        except Exception as e:
+            errors.append(f"{loader}: {e}")
+            continue
+        record_artifact(resolved_path, loader)
+        return obj
+
+    raise RuntimeError(
+        f"Failed to load object from {resolved_path}. Tried dill, pickle, joblib. Errors: {errors}"
+    )
+
+
+SHAP_EXPLAINER_LIBRARIES = ('shap', 'lightgbm')
+
+
+def explainer_stamp_path(path):
+    """Sidecar recording the library versions a persisted explainer was built with."""
+    return f"{path}.versions.json"
+
+
+def read_explainer_stamp(path):
+    """Return the stamp of a persisted explainer, or None if it has none."""
+    try:
+        with open(explainer_stamp_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_explainer_stamp(path, model_version=None):
+    """Stamp a persisted explainer with the current shap/lightgbm versions (and model version)."""
+    stamp = {
+        'versions': library_versions(SHAP_EXPLAINER_LIBRARIES),
+        'model_version': model_version,
+        'created_at': time.time(),
+    }
+    _write_json_atomic(explainer_stamp_path(path), stamp)
+    return stamp
+
+
+def save_shap_explainer(explainer, path, model_version=None):
+    """
+    Persist an explainer with dill, atomically (temporary file + rename), and
+    stamp it with the library versions so other processes load it directly.
+    """
+    import dill
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        dill.dump(explainer, f)
+    os.replace(tmp_path, path)
+    write_explainer_stamp(path, model_version=model_version)
+    record_artifact(path, 'dill')
+    return path
+
+
+def load_shap_explainer(path, classifier, save_rebuilt: bool = False, model_version=None):
+    """
+    Load a SHAP TreeExplainer from a serialized artifact.
+    If the artifact was stamped with other shap/lightgbm versions (or another model
+    version), or if loading fails, rebuild the explainer from the provided classifier.
+    Optionally persist the rebuilt explainer, stamped, so the rebuild happens once.
+
+    Args:
+        path: Base path (with or without extension) to the explainer artifact.
+        classifier: Fitted model used to rebuild the TreeExplainer if needed.
+        save_rebuilt: If True, atomically save the rebuilt explainer back to disk (dill)
+            together with its version stamp.
+        model_version: Version of the pipeline the explainer must belong to; ignored
+            for artifacts stamped without one.
+
+    Returns:
+        A SHAP TreeExplainer instance.
+    """
+    resolved_path = resolve_artifact_path(path)
+    current_versions = library_versions(SHAP_EXPLAINER_LIBRARIES)
+    stamp = read_explainer_stamp(resolved_path) if resolved_path else None
+    reason = None
+    load_err = None
+    if resolved_path is None:
+        reason = "artifact not found"
+    elif stamp is not None and stamp.get('versions') != current_versions:
+        reason = f"built with {stamp.get('versions')}, running {current_versions}"
+    elif stamp is not None and model_version and stamp.get('model_version') not in (None, model_version):
+        reason = f"built for model {stamp['model_version']}, running {model_version}"
+
+    if reason is None:
+        start = time.perf_counter()
+        try:
+            explainer = read_pickle(resolved_path)
+            logger.info("Loaded SHAP explainer %s in %.2fs%s", resolved_path, time.perf_counter() - start,
+                        '' if stamp else ' (unstamped)')
+            return explainer
+        except Exception as e:
+            load_err = e
+            reason = f"load failed: {e}"
+
+    # Rebuild from classifier to avoid pickling issues across SHAP versions
+    logger.warning("Rebuilding SHAP explainer %s: %s", path, reason)
+    try:
+        import shap  # local import to ensure availability
+        start = time.perf_counter()
+        explainer = shap.TreeExplainer(classifier)
+        logger.info("Rebuilt SHAP explainer in %.2fs", time.perf_counter() - start)
+    except Exception as rebuild_err:
+        raise RuntimeError(
+            f"Failed to load or rebuild SHAP explainer from {path}. Load error: {load_err} | Rebuild error: {rebuild_err}"
+        )
+
+    if save_rebuilt:
+        # Replace the original artifact, or save to a .pkl alongside the base path
+        out_path = resolved_path
+        if out_path is None:
+            out_path = path if path.endswith(('.pkl', '.pickle', '.joblib')) else f"{path}.pkl"
+        try:
+            start = time.perf_counter()
+            save_shap_explainer(explainer, out_path, model_version=model_version)
+            logger.info("Saved rebuilt SHAP explainer to %s in %.2fs", out_path, time.perf_counter() - start)
+        except Exception as e:
+            # Saving is best-effort (e.g. read-only image)
+            logger.warning("Could not save rebuilt SHAP explainer to %s: %s", out_path, e)
+    return explainer
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of deserialized model artifacts.
+
+    Every Streamlit session of the process shares the same loaded objects. An entry
+    is identified by its name (defaults to the resolved path) and validated against
+    the file fingerprint (mtime, size and SHA-256, or only mtime and size for large
+    data files), so a redeployed artifact is reloaded on next access while unchanged
+    files are never deserialized twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._checksums = {}
+        self._entries = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def fingerprint(self, path, content_hash=True):
+        """
+        Return (resolved_path, mtime_ns, size, sha256) for an artifact.
+
+        The checksum is only recomputed when mtime or size changed since the last
+        call, and not computed at all (None) when content_hash is False. Missing
+        files return (None, None, None, None).
+        """
+        resolved = resolve_artifact_path(path)
+        if resolved is None:
+            return (None, None, None, None)
+        stat = os.stat(resolved)
+        if not content_hash:
+            return (resolved, stat.st_mtime_ns, stat.st_size, None)
+        with self._lock:
+            known = self._checksums.get(resolved)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            checksum = known[2]
+        else:
+            checksum = file_checksum(resolved)
+            with self._lock:
+                self._checksums[resolved] = (stat.st_mtime_ns, stat.st_size, checksum)
+        return (resolved, stat.st_mtime_ns, stat.st_size, checksum)
+
+    def version(self, path):
+        """Short content hash of an artifact, usable as a model version tag."""
+        checksum = self.fingerprint(path)[3]
+        return checksum[:12] if checksum else None
+
+    def get(self, path, loader=None, name=None, fingerprint_path=None, content_hash=True):
+        """
+        Return the object stored at path, loading it at most once per fingerprint.
+
+        Args:
+            path: Artifact path (with or without extension).
+            loader: Callable taking the path and returning the object. Defaults to read_pickle.
+            name: Cache key; defaults to path. Use distinct names when the same file is
+                loaded in different ways or when the object depends on other artifacts.
+            fingerprint_path: File whose fingerprint validates the entry, when the loader
+                actually reads another file than path (e.g. a columnar copy). Defaults to path.
+            content_hash: If False, the entry is validated on path, mtime and size only,
+                without hashing the file (for large datasets).
+
+        Returns:
+            The loaded object, shared across all callers of the process.
+        """
+        loader = loader or read_pickle
+        key = name or path
+        with self._key_lock(key):
+            resolved, mtime_ns, size, checksum = self.fingerprint(fingerprint_path or path, content_hash)
+            identity = checksum if content_hash else (resolved, mtime_ns, size)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry['identity'] == identity:
+                with self._lock:
+                    entry['hits'] += 1
+                    entry['mtime_ns'] = mtime_ns
+                return entry['object']
+
+            start = time.perf_counter()
+            obj = loader(path)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._entries[key] = {
+                    'object': obj,
+                    'path': resolved,
+                    'mtime_ns': mtime_ns,
+                    'size_bytes': size,
+                    'checksum': checksum,
+                    'identity': identity,
+                    'load_seconds': elapsed,
+                    'loads': (entry['loads'] + 1) if entry else 1,
+                    'hits': entry['hits'] if entry else 0,
+                    'loaded_at': time.time(),
+                }
+            return obj
+
+    def invalidate(self, name=None):
+        """Drop one entry (or all entries when name is None)."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self._checksums.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self):
+        """Return load-time, size and hit statistics for every cached entry."""
+        with self._lock:
+            return {
+                key: {k: v for k, v in entry.items() if k != 'object'}
+                for key, entry in self._entries.items()
+            }
+
+
+_MODEL_REGISTRY = ModelRegistry()
+
+
+def get_model_registry():
+    """Return the process-wide ModelRegistry shared by all sessions."""
+    return _MODEL_REGISTRY
+
+
+def _joblib_load(path):
+    import joblib
+
+    return joblib.load(path)
+
+
+def load_pipeline(path='ressource/pipeline.joblib'):
+    """Load the scoring pipeline once per process (reloaded if the file changes)."""
+    return _MODEL_REGISTRY.get(path, loader=_joblib_load)
+
+
+def load_feats(path='ressource/feats'):
+    """Load the transformed feature names once per process."""
+    return _MODEL_REGISTRY.get(path)
+
+
+def load_cached_shap_explainer(path, classifier, pipeline_path='ressource/pipeline.joblib'):
+    """
+    Load (or rebuild) the SHAP explainer once per process.
+
+    The cache entry is tied to the pipeline version, so redeploying the model
+    also refreshes an explainer rebuilt from its classifier. A rebuilt explainer
+    is persisted with its version stamp so the next processes load it directly.
+    """
+    model_version = _MODEL_REGISTRY.version(pipeline_path)
+    name = f"{path}@{model_version}"
+    return _MODEL_REGISTRY.get(path, name=name,
+                               loader=lambda p: load_shap_explainer(p, classifier, save_rebuilt=True,
+                                                                    model_version=model_version))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the scoring API is skipped because its circuit breaker is open."""
+
+
+class ScoringApiClient:
+    """
+    Shared HTTP client for the credit score API.
+
+    - keep-alive connection pool (one requests.Session for the whole process)
+    - bounded retries with exponential backoff on connection errors and 502/503/504
+    - (connect, read) timeouts: the connect timeout defaults to the share of
+      timeout left for each connection attempt (at most 1s), so retrying an
+      unreachable host costs at most about timeout in total
+    - circuit breaker: after failure_threshold consecutive failures the API is
+      skipped for cooldown seconds, then a single trial request decides whether
+      it is closed again
+    - latency and success-rate counters (see stats())
+    """
+
+    def __init__(self, api_url, timeout=5, retries=2, backoff_factor=0.2, pool_maxsize=10,
+                 failure_threshold=3, cooldown=30.0, connect_timeout=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.connect_timeout = connect_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,  # never replay a request that timed out: keeps the worst case bounded
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._trial_in_flight = False
+        self._counters = {
+            'requests': 0,
+            'successes': 0,
+            'failures': 0,
+            'short_circuited': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0,
+            'last_latency': None,
+        }
+
+    @property
+    def state(self):
+        """'closed', 'open' or 'half-open'."""
+        with self._lock:
+            if self._consecutive_failures < self.failure_threshold:
+                return 'closed'
+            return 'open' if time.monotonic() < self._open_until else 'half-open'
+
+    def _acquire(self):
+        with self._lock:
+            if self._consecutive_failures < self.failure_threshold:
+                return
+            if time.monotonic() >= self._open_until and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self._counters['short_circuited'] += 1
+        raise CircuitOpenError(f"Scoring API circuit open, skipping {self.api_url}")
+
+    def _record(self, success, latency):
+        with self._lock:
+            self._trial_in_flight = False
+            self._counters['requests'] += 1
+            self._counters['total_latency'] += latency
+            self._counters['max_latency'] = max(self._counters['max_latency'], latency)
+            self._counters['last_latency'] = latency
+            if success:
+                self._counters['successes'] += 1
+                self._consecutive_failures = 0
+            else:
+                self._counters['failures'] += 1
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= self.failure_threshold:
+                    self._open_until = time.monotonic() + self.cooldown
+
+    def timeouts(self, timeout=None):
+        """
+        (connect, read) timeouts of a request whose read timeout is timeout.
+
+        The connect timeout is connect_timeout if set, otherwise timeout split
+        over the connection attempts (1 + retries) and capped at 1s.
+        """
+        timeout = timeout or self.timeout
+        connect = self.connect_timeout
+        if connect is None:
+            connect = min(1.0, timeout / (1 + self.retries))
+        return (connect, timeout)
+
+    def predict(self, client_id, timeout=None):
+        """
+        Return the default probability of a client from the API.
+
+        Raises:
+            CircuitOpenError: the API is currently skipped.
+            Exception: any request, HTTP or payload error (counted as a failure).
+        """
+        self._acquire()
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{self.api_url}/predict",
+                                         json={"id": int(client_id)},
+                                         timeout=self.timeouts(timeout))
+            response.raise_for_status()
+            content = response.json()
+            # New API format returns {"credit_score": float, "advice": str}
+            if not (isinstance(content, dict) and "credit_score" in content):
+                raise ValueError(f"Unexpected API response: {content!r}")
+            score = float(content["credit_score"])
+        except Exception:
+            self._record(False, time.perf_counter() - start)
+            raise
+        self._record(True, time.perf_counter() - start)
+        return score
+
+    def stats(self):
+        """Request counters, success rate, mean/max latency (seconds) and breaker state."""
+        state = self.state
+        with self._lock:
+            counters = dict(self._counters)
+        done = counters['requests']
+        counters['success_rate'] = counters['successes'] / done if done else None
+        counters['mean_latency'] = counters['total_latency'] / done if done else None
+        counters['state'] = state
+        return counters
+
+    def close(self):
+        self.session.close()
+
+
+_API_CLIENTS = {}
+_API_CLIENTS_LOCK = threading.Lock()
+
+
+def get_api_client(api_url, **kwargs):
+    """Return the process-wide ScoringApiClient for api_url (created on first use)."""
+    with _API_CLIENTS_LOCK:
+        client = _API_CLIENTS.get(api_url)
+        if client is None:
+            client = _API_CLIENTS[api_url] = ScoringApiClient(api_url, **kwargs)
+        return client
+
+
+class LRUTTLCache:
+    """
+    Thread-safe bounded LRU cache whose entries expire after ttl seconds.
+
+    Keeps hit/miss counters; safe to share between Streamlit sessions.
+    """
+
+    def __init__(self, maxsize=4096, ttl=3600.0):
+        from collections import OrderedDict
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if time.monotonic() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Remove every entry, or only the keys for which predicate(key) is true."""
+        with self._lock:
+            if predicate is None:
+                self._data.clear()
+            else:
+                for key in [k for k in self._data if predicate(k)]:
+                    del self._data[key]
+
+    def __contains__(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and time.monotonic() < item[1]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+            }
+
+
+class PredictionCache(LRUTTLCache):
+    """
+    Default probabilities keyed on (client_id, model_version, source).
+
+    source is 'api' or 'local'; an API answer is preferred over a local one.
+    Local answers computed ahead of time by the Prefetcher are stored under
+    the separate 'prefetch' source: a default lookup ignores them, so a
+    prefetched client is still sent to the API (see predict_with_api_or_local).
+    Entries of other model versions are dropped as soon as a new version is seen,
+    so redeploying pipeline.joblib invalidates the cache automatically.
+    """
+
+    SOURCES = ('api', 'local')
+    PREFETCH = 'prefetch'
+
+    def __init__(self, maxsize=4096, ttl=3600.0):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._model_version = None
+
+    def ensure_version(self, model_version):
+        """Drop entries computed with another model version."""
+        if model_version != self._model_version:
+            self.invalidate(lambda key: key[1] != model_version)
+            self._model_version = model_version
+
+    def lookup(self, client_id, model_version, sources=None):
+        """
+        Return (probability, source) or None (counted as a single hit or miss).
+
+        sources are tried in order, SOURCES by default.
+        """
+        self.ensure_version(model_version)
+        with self._lock:
+            now = time.monotonic()
+            for source in sources or self.SOURCES:
+                key = (int(client_id), model_version, source)
+                item = self._data.get(key)
+                if item is not None and now < item[1]:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return item[0], source
+            self.misses += 1
+            return None
+
+    def store(self, client_id, model_version, source, probability):
+        self.set((int(client_id), model_version, source), probability)
+
+
+_PREDICTION_CACHE = PredictionCache(
+    maxsize=int(os.getenv('PREDICTION_CACHE_SIZE', 4096)),
+    ttl=float(os.getenv('PREDICTION_CACHE_TTL', 3600)),
+)
+
+
+def get_prediction_cache():
+    """Return the process-wide prediction cache shared by all sessions."""
+    return _PREDICTION_CACHE
+
+
+# SHAP values computed by the explainer, keyed on (client_id, model_version)
+_SHAP_CACHE = LRUTTLCache(
+    maxsize=int(os.getenv('SHAP_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('PREDICTION_CACHE_TTL', 3600)),
+)
+
+
+def get_shap_cache():
+    """Return the process-wide cache of explainer SHAP values shared by all sessions."""
+    return _SHAP_CACHE
+
+
+class ScoreStore:
+    """
+    Read-only table of precomputed default probabilities keyed by SK_ID_CURR.
+
+    Produced offline by batch_score (data/scores.parquet) and tagged with the
+    version of the pipeline that computed it.
+    """
+
+    def __init__(self, ids, scores, model_version=None):
+        self.model_version = model_version
+        self._scores = dict(zip(np.asarray(ids).tolist(), np.asarray(scores, dtype='float64').tolist()))
+
+    @classmethod
+    def load(cls, path='data/scores.parquet'):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=['SK_ID_CURR', 'score'])
+        metadata = table.schema.metadata or {}
+        version = metadata.get(b'model_version')
+        return cls(table.column('SK_ID_CURR').to_numpy(),
+                   table.column('score').to_numpy(),
+                   model_version=version.decode() if version else None)
+
+    def get(self, client_id, model_version=None):
+        """
+        Return the stored score of a client, or None if unknown.
+
+        When model_version is given, None is also returned if the store was
+        computed with another model.
+        """
+        if model_version is not None and self.model_version != model_version:
+            return None
+        return self._scores.get(int(client_id))
+
+    def __len__(self):
+        return len(self._scores)
+
+
+def load_score_store(path='data/scores.parquet'):
+    """Load the score store once per process (reloaded if the file changes); None if absent."""
+    if not os.path.exists(path):
+        return None
+    return _MODEL_REGISTRY.get(path, loader=ScoreStore.load)
+
+
+_PREDICTION_SOURCES = {'store': 0, 'cache': 0, 'api': 0, 'local': 0}
+_PREDICTION_SOURCES_LOCK = threading.Lock()
+
+
+def _record_prediction_source(source):
+    with _PREDICTION_SOURCES_LOCK:
+        _PREDICTION_SOURCES[source] += 1
+
+
+def prediction_source_stats():
+    """Number of predictions served by each path (store, cache, api, local)."""
+    with _PREDICTION_SOURCES_LOCK:
+        return dict(_PREDICTION_SOURCES)
+
+
+def predict_local(X_df, classifier, preprocessor, X_trans=None):
+    """
+    Compute the default probability with the local preprocessor + classifier.
+
+    If X_trans (the already transformed row, e.g. from the feature matrix) is
+    given, the preprocessor is not run.
+
+    Returns probability (float between 0 and 1).
+    """
+    if X_trans is None:
+        # Prepare X: remove SK_ID_CURR or TARGET if present
+        X = X_df.copy()
+        for col in ['SK_ID_CURR', 'TARGET']:
+            if col in X.columns:
+                X = X.drop(columns=[col])
+
+        # Preprocess then predict
+        try:
+            X_trans = preprocessor.transform(X)
+        except Exception as exc:
+            raise RuntimeError(f"Preprocessor failed: {exc}")
+
+    try:
+        proba = None
+        # scikit-learn like
+        if hasattr(classifier, 'predict_proba'):
+            proba = classifier.predict_proba(X_trans)[0][1]
+        elif hasattr(classifier, 'predict'):
+            # if only predict exists, assume returns probability-like score
+            proba = float(classifier.predict(X_trans)[0])
+        else:
+            raise RuntimeError('Classifier has no predict_proba nor predict')
+        return float(proba)
+    except Exception as exc:
+        raise RuntimeError(f"Classifier prediction failed: {exc}")
+
+
+_EXECUTORS = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def _get_executor(name, max_workers):
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(name)
+        if executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+            _EXECUTORS[name] = executor
+        return executor
+
+
+# One slot per thread of the scoring pool: API requests never queue behind each other
+_SCORING_SLOTS = threading.BoundedSemaphore(int(os.getenv('SCORING_THREADS', 4)))
+
+
+def get_scoring_executor():
+    """
+    Process-wide thread pool of the API requests of hedged predictions (the
+    local model runs in the caller's thread). Size set by SCORING_THREADS (default 4).
+    """
+    return _get_executor('scoring', int(os.getenv('SCORING_THREADS', 4)))
+
+
+def get_background_executor():
+    """
+    Process-wide thread pool of the per-client background work (prediction,
+    SHAP, comparison statistics). Separate from the scoring pool, whose API
+    requests the background tasks wait on. Size set by BACKGROUND_THREADS (default 4).
+    """
+    return _get_executor('background', int(os.getenv('BACKGROUND_THREADS', 4)))
+
+
+def predict_hedged(client_id, X_df, api_url, classifier, preprocessor, deadline=0.5, timeout=5, X_trans=None,
+                   local_proba=None):
+    """
+    Hedged prediction: send the API request and run the local model meanwhile.
+
+    The API request goes to the scoring pool while the local model runs in the
+    caller's thread. The API answer is preferred if it arrives within deadline
+    seconds, the local one is returned otherwise (or as soon as the API fails).
+    An HTTP request already in flight cannot be interrupted: it finishes in the
+    background (bounded by timeout) and its result is discarded. It holds one
+    of the SCORING_THREADS slots meanwhile; when all slots are taken, the API
+    is skipped and only the local model answers, so API requests still in
+    flight never delay the local path. local_proba is an already known local
+    answer (e.g. prefetched), used instead of running the local model.
+
+    Returns:
+        (probability, source) with source 'api' or 'local'.
+    """
+    from concurrent.futures import wait
+
+    start = time.monotonic()
+    api_future = None
+    if _SCORING_SLOTS.acquire(blocking=False):
+        try:
+            api_future = get_scoring_executor().submit(get_api_client(api_url).predict, client_id, timeout)
+        except Exception:
+            _SCORING_SLOTS.release()
+            raise
+        api_future.add_done_callback(lambda _: _SCORING_SLOTS.release())
+
+    errors = []
+    proba = local_proba
+    if proba is None:
+        try:
+            proba = predict_local(X_df, classifier, preprocessor, X_trans=X_trans() if callable(X_trans) else X_trans)
+        except Exception as e:
+            errors.append(f"local: {e}")
+
+    if api_future is not None:
+        # Without a local answer, the API is awaited until its own timeout
+        wait([api_future], timeout=max(0.0, deadline - (time.monotonic() - start)) if proba is not None else None)
+        if api_future.done():
+            if api_future.exception() is None:
+                return api_future.result(), 'api'
+            errors.append(f"api: {api_future.exception()}")
+    if proba is not None:
+        return proba, 'local'
+    raise RuntimeError(f"Hedged prediction failed: {errors}")
+
+
+def predict_with_api_or_local(client_id, X_df, api_url=None, classifier=None, preprocessor=None, timeout=5,
+                              cache=None, model_version=None, score_store=None, return_source=False,
+                              X_trans=None, hedge_deadline=None, prefetch=False):
+    """
+    Try to get prediction from API. If it fails, and classifier+preprocessor are provided,
+    compute local probability using classifier.predict_proba.
+
+    Lookup order: precomputed ScoreStore (if given and of the same model_version),
+    PredictionCache (if given), API, local model. New API/local answers are stored
+    in the cache under the source that produced them. The path that served each
+    request is counted (see prediction_source_stats).
+
+    X_trans is an optional already transformed row used by the local model
+    instead of running the preprocessor, or a callable returning it (only
+    called when the local model is used).
+
+    With hedge_deadline (seconds), the local model runs while the API request
+    is in flight (see predict_hedged): the API answer is kept if it arrives
+    within the deadline, the local one otherwise, so a slow API costs the
+    deadline instead of the full timeout.
+
+    With prefetch, the call only warms the cache for a later request: the API
+    is not called and a new local answer is stored under the 'prefetch'
+    source. A later request still tries the API first and uses the prefetched
+    answer as its local one (hedge or fallback) instead of running the model.
+
+    Returns probability (float between 0 and 1), or (probability, source) when
+    return_source is True, source being 'store', 'cache', 'api' or 'local'.
+    """
+    def _served(proba, source):
+        if not prefetch:
+            _record_prediction_source(source)
+        return (proba, source) if return_source else proba
+
+    if score_store is not None:
+        stored = score_store.get(client_id, model_version=model_version)
+        if stored is not None:
+            return _served(stored, 'store')
+
+    prefetched = None
+    if cache is not None:
+        sources = cache.SOURCES + (cache.PREFETCH,) if prefetch else None
+        cached = cache.lookup(client_id, model_version, sources=sources)
+        if cached is not None:
+            return _served(cached[0], 'cache')
+        if not prefetch:
+            prefetched = cache.lookup(client_id, model_version, sources=(cache.PREFETCH,))
+            prefetched = prefetched[0] if prefetched is not None else None
+
+    if prefetch:
+        if callable(X_trans):
+            X_trans = X_trans()
+        proba = predict_local(X_df, classifier, preprocessor, X_trans=X_trans)
+        if cache is not None:
+            cache.store(client_id, model_version, cache.PREFETCH, proba)
+        return _served(proba, 'local')
+
+    proba = None
+    source = 'api'
+    local_available = prefetched is not None or (
+        classifier is not None and (preprocessor is not None or X_trans is not None))
+    if api_url and local_available and hedge_deadline is not None:
+        proba, source = predict_hedged(client_id, X_df, api_url, classifier, preprocessor,
+                                       deadline=hedge_deadline, timeout=timeout, X_trans=X_trans,
+                                       local_proba=prefetched)
+    # Try API if provided (pooled session; skipped while the circuit breaker is open)
+    elif api_url:
+        try:
+            proba = get_api_client(api_url).predict(client_id, timeout=timeout)
+        except Exception:
+            # swallow and fallback to local if available
+            pass
+
+    # Local fallback (the prefetched local answer if any)
+    if proba is None:
+        if not local_available:
+            raise RuntimeError("No API response and no local model available for prediction")
+        if prefetched is not None:
+            proba = prefetched
+        else:
+            if callable(X_trans):
+                X_trans = X_trans()
+            proba = predict_local(X_df, classifier, preprocessor, X_trans=X_trans)
+        source = 'local'
+
+    if cache is not None:
+        cache.store(client_id, model_version, source, proba)
+    return _served(proba, source)
+
+
+class _CompiledPreprocessor:
+    """NumPy re-implementation of a fitted ColumnTransformer (see compile_pipeline)."""
+
+    def __init__(self, blocks):
+        # blocks: list of (columns, steps); steps: list of (kind, params)
+        self.blocks = blocks
+        self._positions = {}
+
+    def _block_positions(self, columns):
+        # Column positions of every block, cached per input column layout
+        positions = self._positions.get(columns)
+        if positions is None:
+            index = {col: i for i, col in enumerate(columns)}
+            positions = [[index[col] for col in block_columns] for block_columns, _ in self.blocks]
+            self._positions[columns] = positions
+        return positions
+
+    def transform(self, X):
+        # One conversion of the whole frame, then plain array indexing per block
+        rows = X.to_numpy(dtype=object)
+        outputs = []
+        for (_, steps), positions in zip(self.blocks, self._block_positions(tuple(X.columns))):
+            values = rows[:, positions]
+            if all(kind in ('impute_num', 'scale') for kind, _ in steps):
+                values = values.astype('float64')
+            for kind, params in steps:
+                if kind == 'impute_num':
+                    missing = np.isnan(values)
+                    if missing.any():
+                        values = np.where(missing, params, values)
+                elif kind == 'impute_cat':
+                    missing = pd.isna(values)
+                    if missing.any():
+                        values = np.where(missing, params, values)
+                elif kind == 'scale':
+                    mean, scale = params
+                    if mean is not None:
+                        values = values - mean
+                    if scale is not None:
+                        values = values / scale
+                elif kind == 'onehot':
+                    lookups, width = params
+                    encoded = np.zeros((len(values), width))
+                    for j, (offset, lookup) in enumerate(lookups):
+                        for i, value in enumerate(values[:, j]):
+                            position = lookup.get(value)
+                            if position is not None:
+                                encoded[i, offset + position] = 1.0
+                    values = encoded
+            outputs.append(np.asarray(values, dtype='float64'))
+        return np.hstack(outputs) if len(outputs) > 1 else outputs[0]
+
+
+class _CompiledClassifier:
+    """Binary LightGBM booster called on a raw float64 array."""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict_proba(self, X):
+        proba = self.booster.predict(np.asarray(X, dtype='float64'))
+        return np.column_stack([1 - proba, proba])
+
+
+def _compile_step(step):
+    """(kind, params) of a fitted sklearn step, or NotImplementedError."""
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    if isinstance(step, SimpleImputer):
+        if step.add_indicator or not (isinstance(step.missing_values, float) and np.isnan(step.missing_values)):
+            raise NotImplementedError("SimpleImputer with indicator or custom missing_values")
+        statistics = step.statistics_
+        if statistics.dtype.kind == 'f':
+            if np.isnan(statistics).any():
+                raise NotImplementedError("SimpleImputer with empty features")
+            return 'impute_num', statistics.astype('float64')
+        return 'impute_cat', statistics.astype(object)
+    if isinstance(step, StandardScaler):
+        return 'scale', (step.mean_ if step.with_mean else None, step.scale_ if step.with_std else None)
+    if isinstance(step, OneHotEncoder):
+        if step.drop_idx_ is not None or getattr(step, '_infrequent_enabled', False):
+            raise NotImplementedError("OneHotEncoder with drop or infrequent categories")
+        if step.handle_unknown != 'ignore':
+            raise NotImplementedError("OneHotEncoder with handle_unknown='error'")
+        lookups, offset = [], 0
+        for categories in step.categories_:
+            lookups.append((offset, {value: i for i, value in enumerate(categories.tolist())}))
+            offset += len(categories)
+        return 'onehot', (lookups, offset)
+    raise NotImplementedError(f"Unsupported step {type(step).__name__}")
+
+
+def compile_pipeline(pipeline):
+    """
+    Extract the fitted parameters of the scoring pipeline into NumPy arrays.
+
+    Supports a ColumnTransformer (remainder='drop') of SimpleImputer,
+    StandardScaler and OneHotEncoder(handle_unknown='ignore') steps followed
+    by a binary LightGBM classifier, whose booster is called directly. This
+    skips the pandas/sklearn validation that dominates single-row scoring.
+
+    Returns:
+        (preprocessor, classifier) with the transform / predict_proba interface
+        of the originals. Raises NotImplementedError for anything else: the
+        result must be checked with verify_compiled_pipeline before use.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
+    preprocessing = pipeline[:-1]
+    if len(preprocessing.steps) != 1 or not isinstance(preprocessing[0], ColumnTransformer):
+        raise NotImplementedError("Preprocessing must be a single ColumnTransformer")
+    column_transformer = preprocessing[0]
+    if column_transformer.sparse_output_:
+        raise NotImplementedError("Sparse ColumnTransformer output")
+
+    blocks = []
+    for name, transformer, columns in column_transformer.transformers_:
+        if name == 'remainder':
+            if transformer != 'drop' and len(columns):
+                raise NotImplementedError("ColumnTransformer remainder must be dropped")
+            continue
+        if transformer == 'drop' or not len(columns):
+            continue
+        steps = [step for _, step in transformer.steps] if isinstance(transformer, Pipeline) else [transformer]
+        blocks.append((list(columns), [_compile_step(step) for step in steps]))
+
+    classifier = pipeline.named_steps['classifier']
+    booster = getattr(classifier, 'booster_', None)
+    if booster is None or getattr(classifier, 'n_classes_', 2) != 2:
+        raise NotImplementedError("Classifier must be a binary LightGBM model")
+    return _CompiledPreprocessor(blocks), _CompiledClassifier(booster)
+
+
+def verify_compiled_pipeline(pipeline, compiled, X, atol=1e-9):
+    """
+    True when the compiled pipeline reproduces pipeline on X (transformed
+    features and probabilities within atol). X should include missing values
+    and unseen categories.
+    """
+    preprocessor, classifier = compiled
+    expected = np.asarray(pipeline[:-1].transform(X), dtype='float64')
+    transformed = preprocessor.transform(X)
+    if transformed.shape != expected.shape or not np.allclose(transformed, expected, rtol=0, atol=atol, equal_nan=True):
+        return False
+    expected_proba = pipeline.named_steps['classifier'].predict_proba(expected)[:, 1]
+    return bool(np.allclose(classifier.predict_proba(transformed)[:, 1], expected_proba, rtol=0, atol=atol))
+
+
+def _verification_sample(dataset_path, n_rows):
+    """Dataset rows plus an all-missing row and a row of unseen categories."""
+    X = load_dataset(dataset_path).iloc[:n_rows]
+    X = X.drop(columns=[c for c in ('SK_ID_CURR', 'TARGET') if c in X.columns])
+    edge_cases = X.iloc[:2].astype(object)
+    edge_cases.iloc[0, :] = np.nan
+    for j, col in enumerate(X.columns):
+        if not pd.api.types.is_numeric_dtype(X[col]):
+            edge_cases.iloc[1, j] = '__unseen__'
+    sample = pd.concat([X.astype(object), edge_cases], ignore_index=True)
+    return sample.infer_objects()
+
+
+def load_compiled_pipeline(path='ressource/pipeline.joblib', dataset_path='data/dataset_sample.csv', n_verify=1000):
+    """
+    Compiled fast path of the pipeline, once per process (see compile_pipeline).
+
+    The compiled pipeline is checked against the sklearn pipeline on the first
+    n_verify dataset rows plus edge cases; None is returned (and the sklearn
+    pipeline should be used) when it is unsupported or does not match.
+    """
+    def _load(p):
+        pipeline = load_pipeline(p)
+        try:
+            compiled = compile_pipeline(pipeline)
+        except NotImplementedError as e:
+            logger.info("Compiled inference disabled for %s: %s", p, e)
+            return None
+        try:
+            verified = verify_compiled_pipeline(pipeline, compiled, _verification_sample(dataset_path, n_verify))
+        except Exception as e:
+            logger.warning("Compiled inference disabled for %s: verification failed: %s", p, e)
+            return None
+        if not verified:
+            logger.warning("Compiled inference disabled for %s: results differ from the sklearn pipeline", p)
+            return None
+        return compiled
+
+    return _MODEL_REGISTRY.get(path, loader=_load, name=f"compiled:{path}")
+
+
+class ScoringContext:
+    """
+    Everything computed for one client in one request, each piece at most once.
+
+    raw row -> features (row without SK_ID_CURR/TARGET) -> transformed vector
+    -> probability and SHAP values. Every attribute is computed lazily on first
+    access and then reused, so the gauge and the SHAP view share a single
+    preprocessor.transform (or a single feature-matrix lookup). Safe to use from
+    several threads: each attribute has its own lock.
+
+    Args:
+        client_id: SK_ID_CURR of the client.
+        row: One-row DataFrame of the client (model features, may include SK_ID_CURR/TARGET).
+        pipeline: Fitted scoring pipeline (preprocessing steps + 'classifier').
+        model_version: Version tag used by the score store, the prediction cache
+            and the precomputed matrices.
+        api_url, cache, score_store: See predict_with_api_or_local.
+        feature_matrix: Optional IndexedMatrix of transformed rows (build_feature_matrix).
+        shap_store: Optional ShapStore of precomputed SHAP values (build_shap_store).
+        explainer: SHAP explainer, or a callable returning it (only called if needed).
+        compiled: Optional (preprocessor, classifier) fast path from load_compiled_pipeline,
+            used instead of the sklearn pipeline for the transform and the local prediction.
+        hedge_deadline: If set, the local model runs while the API request is in flight (see predict_hedged).
+        shap_cache: Optional LRUTTLCache of explainer SHAP values (see get_shap_cache).
+        prefetch: Context of the Prefetcher: the prediction only warms the cache
+            (local model, 'prefetch' source, see predict_with_api_or_local).
+
+    Example:
+        context = ScoringContext(client_id, clients.row(client_id), pipeline, model_version=version)
+        context.probability
+        context.shap_values
+    """
+
+    def __init__(self, client_id, row, pipeline, model_version=None, api_url=None, cache=None,
+                 score_store=None, feature_matrix=None, shap_store=None, explainer=None, timeout=5,
+                 compiled=None, hedge_deadline=None, shap_cache=None, prefetch=False):
+        self.client_id = client_id
+        self.row = row
+        self.pipeline = pipeline
+        self.model_version = model_version
+        self.api_url = api_url
+        self.cache = cache
+        self.score_store = score_store
+        self.feature_matrix = feature_matrix
+        self.shap_store = shap_store
+        self.explainer = explainer
+        self.timeout = timeout
+        self.hedge_deadline = hedge_deadline
+        self.shap_cache = shap_cache
+        self.prefetch = prefetch
+        if compiled is not None:
+            self.preprocessor, self.classifier = compiled
+        else:
+            self.preprocessor, self.classifier = pipeline[:-1], pipeline.named_steps['classifier']
+        self._values = {}
+        self._locks = {name: threading.Lock() for name in ('features', 'transformed', 'prediction', 'shap_values')}
+
+    def _once(self, name, compute):
+        with self._locks[name]:
+            if name not in self._values:
+                self._values[name] = compute()
+            return self._values[name]
+
+    def computed(self):
+        """Names of the attributes already computed."""
+        return sorted(self._values)
+
+    @property
+    def features(self):
+        """The client's row without SK_ID_CURR and TARGET."""
+        return self._once('features', lambda: self.row.drop(
+            columns=[c for c in ('SK_ID_CURR', 'TARGET') if c in self.row.columns]))
+
+    @property
+    def transformed(self):
+        """Preprocessed (1, n_features) float64 array, from the feature matrix when available."""
+        def _transform():
+            if self.feature_matrix is not None and self.feature_matrix.contains(self.client_id):
+                return np.asarray(self.feature_matrix.row(self.client_id), dtype='float64')[np.newaxis, :]
+            return np.asarray(self.preprocessor.transform(self.features), dtype='float64')
+        return self._once('transformed', _transform)
+
+    @property
+    def prediction(self):
+        """(probability, source) as returned by predict_with_api_or_local."""
+        return self._once('prediction', lambda: predict_with_api_or_local(
+            self.client_id,
+            self.features,
+            api_url=self.api_url,
+            classifier=self.classifier,
+            preprocessor=self.preprocessor,
+            timeout=self.timeout,
+            cache=self.cache,
+            model_version=self.model_version,
+            score_store=self.score_store,
+            return_source=True,
+            X_trans=lambda: self.transformed,
+            hedge_deadline=self.hedge_deadline,
+            prefetch=self.prefetch))
+
+    @property
+    def probability(self):
+        """Default probability of the client."""
+        return self.prediction[0]
+
+    @property
+    def shap_values(self):
+        """Class-1 SHAP values of the client (n_features,): SHAP store, SHAP cache, then explainer."""
+        def _explain():
+            if self.shap_store is not None and self.shap_store.contains(self.client_id):
+                return np.asarray(self.shap_store.row(self.client_id))
+            key = (int(self.client_id), self.model_version)
+            if self.shap_cache is not None:
+                cached = self.shap_cache.get(key)
+                if cached is not None:
+                    return cached
+            explainer = self.explainer
+            if explainer is not None and not hasattr(explainer, 'shap_values'):
+                explainer = explainer()
+            if explainer is None:
+                raise RuntimeError("No SHAP store entry and no explainer available")
+            values = shap_values_class1(explainer.shap_values(self.transformed))[0]
+            if self.shap_cache is not None:
+                self.shap_cache.set(key, values)
+            return values
+        return self._once('shap_values', _explain)
+
+    def shap_top_k(self, k=15):
+        """Stored column indices of the k largest |SHAP| values (ShapStore.top_k), None if not precomputed."""
+        store = self.shap_store
+        if store is None or store.topk is None or store.topk.shape[1] < k or not store.contains(self.client_id):
+            return None
+        return store.top_k(self.client_id)[:k]
+
+
+def current_rss_bytes():
+    """Resident memory of the process (from /proc/self/statm), None where unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def next_client_ids(client_id, ordering, n=5):
+    """The n ids following client_id in ordering (a list of ids), [] if it is not in it."""
+    try:
+        position = ordering.index(client_id)
+    except ValueError:
+        return []
+    return list(ordering[position + 1:position + 1 + n])
+
+
+def _read_work_queue(path):
+    if path.endswith('.csv'):
+        return [int(i) for i in pd.read_csv(path, usecols=['SK_ID_CURR'])['SK_ID_CURR'].dropna()]
+    with open(path) as f:
+        return [int(line.split(',')[0]) for line in f if line.strip() and line.strip()[0].isdigit()]
+
+
+def load_work_queue(path):
+    """
+    Ordered client ids of a work queue file, read once per process (reloaded if
+    the file changes): one SK_ID_CURR per line, or a CSV with a SK_ID_CURR column.
+    """
+    return _MODEL_REGISTRY.get(path, loader=_read_work_queue, name=f"work_queue:{path}")
+
+
+class Prefetcher:
+    """
+    Warms the prediction and SHAP caches of the clients likely to be opened next.
+
+    Each prefetched client goes through a ScoringContext built by make_context,
+    so results land in the same caches as foreground requests (prediction
+    cache, SHAP cache). make_context should build contexts with prefetch=True:
+    their work then runs entirely in the prefetch threads, never in the
+    scoring pool of the foreground predictions, and sends no API request. The
+    prefetched scores are stored under the 'prefetch' source of the prediction
+    cache, so the foreground still asks the API first and only uses them as
+    its local answer. Prefetching never competes unboundedly with the foreground:
+
+    - at most max_concurrency workers run, in a dedicated thread pool; each
+      warms clients one after the other from a pending queue
+    - a new schedule() replaces the pending queue (the previous client's
+      neighbours are no longer likely)
+    - no client is started while the process resident memory is above
+      max_rss_mb (see current_rss_bytes); the pending queue is then dropped
+
+    Args:
+        make_context: Callable client_id -> ScoringContext.
+        max_concurrency: Maximum number of clients warmed at the same time.
+        max_rss_mb: Memory cap in MB, None to disable it.
+    """
+
+    def __init__(self, make_context, max_concurrency=2, max_rss_mb=None):
+        from collections import deque
+
+        self.make_context = make_context
+        self.max_concurrency = max_concurrency
+        self.max_rss_mb = max_rss_mb
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._in_flight = set()
+        self._workers = 0
+        self._counters = {'scheduled': 0, 'warmed': 0, 'errors': 0, 'skipped_memory': 0}
+
+    def memory_ok(self):
+        """False when the resident memory is above the cap."""
+        if self.max_rss_mb is None:
+            return True
+        rss = current_rss_bytes()
+        return rss is None or rss < self.max_rss_mb * 1e6
+
+    def schedule(self, client_ids):
+        """
+        Queue the given clients (in order) for warming, replacing the pending ones.
+
+        Returns:
+            The number of clients queued.
+        """
+        with self._lock:
+            self._pending.clear()
+            self._pending.extend(i for i in client_ids if i not in self._in_flight)
+            self._counters['scheduled'] += len(self._pending)
+            queued = len(self._pending)
+            to_start = min(self.max_concurrency - self._workers, queued)
+            self._workers += to_start
+        executor = _get_executor('prefetch', self.max_concurrency)
+        for _ in range(to_start):
+            executor.submit(self._run)
+        return queued
+
+    def _next(self):
+        with self._lock:
+            if not self._pending:
+                self._workers -= 1
+                return None
+            client_id = self._pending.popleft()
+            self._in_flight.add(client_id)
+            return client_id
+
+    def _run(self):
+        while True:
+            client_id = self._next()
+            if client_id is None:
+                return
+            try:
+                if not self.memory_ok():
+                    with self._lock:
+                        self._counters['skipped_memory'] += 1 + len(self._pending)
+                        self._pending.clear()
+                    continue
+                context = self.make_context(client_id)
+                context.prediction
+                context.shap_values
+                with self._lock:
+                    self._counters['warmed'] += 1
+            except Exception as e:
+                logger.debug("Prefetch of client %s failed: %s", client_id, e)
+                with self._lock:
+                    self._counters['errors'] += 1
+            finally:
+                with self._lock:
+                    self._in_flight.discard(client_id)
+
+    def stats(self):
+        """Counters, queue length, workers and current resident memory (MB)."""
+        rss = current_rss_bytes()
+        with self._lock:
+            return {**self._counters,
+                    'pending': len(self._pending),
+                    'in_flight': len(self._in_flight),
+                    'workers': self._workers,
+                    'rss_mb': rss / 1e6 if rss is not None else None,
+                    'max_rss_mb': self.max_rss_mb}
+
+
+def iter_dataset_chunks(path, chunksize=50000, columns=None):
+    """
+    Stream a dataset as DataFrame chunks of at most chunksize rows.
+
+    Reads record batches from the columnar copy when one is up to date (see
+    find_columnar_file), otherwise the CSV in chunks.
+    """
+    columnar = find_columnar_file(path)
+    if columnar is not None and columnar.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(columnar).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif columnar is not None:
+        import pyarrow.feather as feather
 
-    This makes it robust to artifacts saved with either pickle/dill or joblib.
+        table = feather.read_table(columnar, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, encoding='ISO-8859-1', usecols=columns, chunksize=chunksize)
+
+
+def score_frame(pipeline, df, id_column='SK_ID_CURR'):
     """
-    # Resolve actual path: if given path doesn't exist, try common extensions.
-    resolved_path = path
-    if not os.path.exists(resolved_path):
-        for ext in ('.pkl', '.pickle', '.joblib'):
-            candidate = f"{path}{ext}"
-            if os.path.exists(candidate):
-                resolved_path = candidate
-                break
-    if not os.path.exists(resolved_path):
-        raise FileNotFoundError(f"Pickle path not found: {path}")
+    Score every row of df in one vectorized predict_proba call.
 
-    # Attempt to load with dill, then pickle, then joblib
-    # Note: joblib can load many pickle files, but we keep it last to allow dill-specific objects first
-    errors = []
-    try:
-        with open(resolved_path, 'rb') as f:
-            return dill.load(f)
-    except Exception as e:
-        errors.append(f"dill: {e}")
-    try:
-        with open(resolved_path, 'rb') as f:
-            return pickle.load(f)
-    except Exception as e:
-        errors.append(f"pickle: {e}")
-    try:
-        return joblib.load(resolved_path)
-    except Exception as e:
-        errors.append(f"joblib: {e}")
+    Returns:
+        DataFrame with the id column and the default probability ('score').
+    """
+    X = df.drop(columns=[c for c in (id_column, 'TARGET') if c in df.columns])
+    X = X.replace([np.inf, -np.inf], np.nan)
+    scores = pipeline.predict_proba(X)[:, 1]
+    return pd.DataFrame({id_column: df[id_column].to_numpy(dtype='int64'), 'score': scores})
 
-    raise RuntimeError(
-        f"Failed to load object from {resolved_path}. Tried dill, pickle, joblib. Errors: {errors}"
-    )
+
+_WORKER_PIPELINE = None
+
+
+def _init_scoring_worker(pipeline_path):
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = load_pipeline(pipeline_path)
+
+
+def _score_chunk_in_worker(df):
+    return score_frame(_WORKER_PIPELINE, df)
 
 
-def load_shap_explainer(path, classifier, save_rebuilt: bool = False):
+def batch_score(dataset_path='data/dataset_sample.csv', pipeline_path='ressource/pipeline.joblib',
+                out_path='data/scores.parquet', chunksize=50000, n_jobs=1, progress=None):
     """
-    Load a SHAP TreeExplainer from a serialized artifact.
-    If loading fails due to environment/class version mismatch, rebuild the explainer
-    from the provided classifier. Optionally persist the rebuilt explainer.
+    Score a whole dataset with the pipeline, chunk by chunk, into a Parquet file.
 
     Args:
-        path: Base path (with or without extension) to the explainer artifact.
-        classifier: Fitted model used to rebuild the TreeExplainer if needed.
-        save_rebuilt: If True, save the rebuilt explainer back to disk using dill.
+        dataset_path: CSV dataset (its Parquet/Feather copy is used when up to date).
+        pipeline_path: Fitted pipeline (preprocessing + classifier).
+        out_path: Parquet output with SK_ID_CURR and score columns; the model
+            version (pipeline hash) is stored in the file metadata.
+        chunksize: Rows per chunk.
+        n_jobs: Number of worker processes (1 scores in the current process).
+        progress: Optional callable receiving the running number of scored rows.
 
     Returns:
-        A SHAP TreeExplainer instance.
+        dict with rows, seconds, rows_per_sec, model_version and out_path.
     """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from concurrent.futures import ProcessPoolExecutor
+    from collections import deque
+
+    model_version = _MODEL_REGISTRY.version(pipeline_path)
+    start = time.perf_counter()
+    rows = 0
+    writer = None
+    tmp_path = f"{out_path}.tmp"
+
+    def _write(scored):
+        nonlocal writer, rows
+        table = pa.Table.from_pandas(scored, preserve_index=False)
+        if writer is None:
+            schema = table.schema.with_metadata({
+                b'model_version': str(model_version).encode(),
+                b'pipeline': pipeline_path.encode(),
+            })
+            writer = pq.ParquetWriter(tmp_path, schema)
+        writer.write_table(table.cast(writer.schema))
+        rows += len(scored)
+        if progress is not None:
+            progress(rows)
+
     try:
-        explainer = read_pickle(path)
-        return explainer
-    except Exception as load_err:
-        # Rebuild from classifier to avoid pickling issues across SHAP versions
-        try:
-            import shap  # local import to ensure availability
-            explainer = shap.TreeExplainer(classifier)
-            if save_rebuilt:
-                # Save using dill to a .pkl alongside original base path
-                out_path = path
-                if not os.path.exists(out_path) and not out_path.endswith(('.pkl', '.pickle', '.joblib')):
-                    out_path = f"{path}.pkl"
-                try:
-                    with open(out_path, 'wb') as f:
-                        dill.dump(explainer, f)
-                except Exception:
-                    # Saving is best-effort; ignore persistence errors
-                    pass
-            return explainer
-        except Exception as rebuild_err:
-            raise RuntimeError(
-                f"Failed to load or rebuild SHAP explainer from {path}. Load error: {load_err} | Rebuild error: {rebuild_err}"
-            )
+        chunks = iter_dataset_chunks(dataset_path, chunksize=chunksize)
+        if n_jobs == 1:
+            pipeline = load_pipeline(pipeline_path)
+            for chunk in chunks:
+                _write(score_frame(pipeline, chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_scoring_worker,
+                                     initargs=(pipeline_path,)) as pool:
+                # Keep a bounded number of chunks in flight, written back in order
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_score_chunk_in_worker, chunk))
+                    if len(pending) >= 2 * n_jobs:
+                        _write(pending.popleft().result())
+                while pending:
+                    _write(pending.popleft().result())
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise RuntimeError(f"No rows to score in {dataset_path}")
+    os.replace(tmp_path, out_path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed else None,
+        'model_version': model_version,
+        'out_path': out_path,
+    }
 
 
-def predict_with_api_or_local(client_id, X_df, api_url=None, classifier=None, preprocessor=None, timeout=5):
+class IndexedMatrix:
     """
-    Try to get prediction from API. If it fails, and classifier+preprocessor are provided,
-    compute local probability using classifier.predict_proba.
+    Dense float32 matrix on disk whose rows are keyed by SK_ID_CURR.
 
-    Returns probability (float between 0 and 1).
+    Files for a base path such as ressource/shap_values:
+        <base>.npy       the (n_clients, n_columns) matrix, memory-mapped read-only
+        <base>.ids.npy   the SK_ID_CURR of each row
+        <base>.json      column names, model version and extra metadata (written last)
+
+    Rows are returned as zero-copy views of the memory map, so several worker
+    processes share the same pages through the OS page cache.
     """
-    # Try API if provided
-    if api_url:
-        import requests
+
+    def __init__(self, base, matrix, ids, meta):
+        self.base = base
+        self.matrix = matrix
+        self.ids = ids
+        self.meta = meta
+        self.columns = meta.get('columns')
+        self.model_version = meta.get('model_version')
+        self._positions = {client_id: pos for pos, client_id in enumerate(ids.tolist())}
+
+    @classmethod
+    def open(cls, base):
+        with open(f"{base}.json") as f:
+            meta = json.load(f)
+        matrix = np.load(f"{base}.npy", mmap_mode='r')
+        ids = np.load(f"{base}.ids.npy")
+        return cls(base, matrix, ids, meta)
+
+    @staticmethod
+    def create(base, ids, n_columns, suffix='.npy', dtype='float32'):
+        """
+        Allocate a temporary on-disk matrix with one row per id and return it as
+        a writable memmap. Nothing is visible to readers before commit().
+        """
+        ids = np.asarray(ids, dtype='int64')
+        with open(f"{base}.ids.npy.tmp", 'wb') as f:
+            np.save(f, ids)
+        return np.lib.format.open_memmap(f"{base}{suffix}.tmp", mode='w+', dtype=dtype, shape=(len(ids), n_columns))
+
+    @staticmethod
+    def commit(base, suffixes=('.npy',), **meta):
+        """
+        Move the temporary files in place, then write the metadata.
+
+        Files are replaced (not overwritten), so processes still mapping the
+        previous version keep reading it safely until they reopen the store.
+        """
+        for suffix in ('.ids.npy',) + tuple(suffixes):
+            os.replace(f"{base}{suffix}.tmp", f"{base}{suffix}")
+        tmp_path = f"{base}.json.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, f"{base}.json")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def contains(self, client_id):
+        return int(client_id) in self._positions
+
+    def row(self, client_id):
+        """Return a client's row (read-only view), or KeyError if unknown."""
         try:
-            data_json = {"id": int(client_id)}
-            headers = {"Content-Type": "application/json"}
-            response = requests.post(f"{api_url}/predict", json=data_json, headers=headers, timeout=timeout)
-            response.raise_for_status()
-            content = response.json()
-            # New API format returns {"credit_score": float, "advice": str}
-            if isinstance(content, dict) and "credit_score" in content:
-                return float(content["credit_score"])
-        except Exception:
-            # swallow and fallback to local if available
-            pass
+            return self.matrix[self._positions[int(client_id)]]
+        except KeyError:
+            raise KeyError(f"Client {client_id} not found in {self.base}") from None
+
 
-    # Local fallback
-    if classifier is None or preprocessor is None:
-        raise RuntimeError("No API response and no local model available for prediction")
+class ShapStore(IndexedMatrix):
+    """
+    Precomputed SHAP values (class 1) of every client, plus their top-k features.
 
-    # Prepare X: remove SK_ID_CURR or TARGET if present
-    X = X_df.copy()
-    for col in ['SK_ID_CURR', 'TARGET']:
-        if col in X.columns:
-            X = X.drop(columns=[col])
+    Extra file <base>.topk.npy holds, per row, the column indices of the k largest
+    |SHAP| values in decreasing order.
+    """
 
-    # Preprocess then predict
-    try:
-        X_trans = preprocessor.transform(X)
-    except Exception as exc:
-        raise RuntimeError(f"Preprocessor failed: {exc}")
+    def __init__(self, base, matrix, ids, meta):
+        super().__init__(base, matrix, ids, meta)
+        topk_path = f"{base}.topk.npy"
+        self.topk = np.load(topk_path, mmap_mode='r') if os.path.exists(topk_path) else None
+        self.expected_value = meta.get('expected_value')
+
+    def top_k(self, client_id):
+        """Column indices of the client's most important features."""
+        if self.topk is None:
+            raise RuntimeError(f"No top-k index stored for {self.base}")
+        return self.topk[self._positions[int(client_id)]]
+
+
+def open_indexed_matrix(base, cls=IndexedMatrix, model_version=None):
+    """
+    Open an IndexedMatrix (or subclass) once per process, None if absent.
+
+    Also returns None when model_version is given and the stored matrix was
+    computed with another model.
+    """
+    if not os.path.exists(f"{base}.json"):
+        return None
+    store = _MODEL_REGISTRY.get(f"{base}.json", loader=lambda _: cls.open(base), name=f"{cls.__name__}:{base}")
+    if model_version is not None and store.model_version != model_version:
+        return None
+    return store
+
+
+def load_shap_store(base='ressource/shap_values', model_version=None):
+    """Open the precomputed SHAP store (see build_shap_store), None if absent or stale."""
+    return open_indexed_matrix(base, cls=ShapStore, model_version=model_version)
+
+
+def shap_values_class1(shap_values):
+    """Normalize TreeExplainer output to the (n_samples, n_features) values of class 1."""
+    if isinstance(shap_values, list):
+        return np.asarray(shap_values[1])
+    shap_values = np.asarray(shap_values)
+    if shap_values.ndim == 3:
+        return shap_values[:, :, 1]
+    return shap_values
+
+
+def top_k_shap(shap_values, k=15):
+    """
+    Column indices of the k largest absolute SHAP values, by decreasing magnitude.
+
+    Works on one sample (n_features,) -> (k,) or on a batch
+    (n_samples, n_features) -> (n_samples, k). np.argpartition selects the k
+    candidates in linear time; only those k are sorted.
+    """
+    magnitude = np.abs(np.asarray(shap_values))
+    k = min(k, magnitude.shape[-1])
+    if k <= 0:
+        return np.empty(magnitude.shape[:-1] + (0,), dtype='int64')
+    candidates = np.argpartition(-magnitude, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(magnitude, candidates, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def build_shap_store(explainer, pipeline, dataset_path='data/dataset_sample.csv', base='ressource/shap_values',
+                     feature_names=None, model_version=None, chunksize=10000, k=15, progress=None):
+    """
+    Compute the SHAP values of a whole dataset in chunks into a ShapStore.
+
+    Each chunk is transformed with pipeline[:-1] and explained in one vectorized
+    explainer.shap_values call; values are written as float32 straight into the
+    memory-mapped matrix, together with the per-row top-k feature indices.
+
+    Returns:
+        dict with rows, seconds and base.
+    """
+    start = time.perf_counter()
+    preprocessor = pipeline[:-1]
+    ids = np.concatenate([chunk['SK_ID_CURR'].to_numpy(dtype='int64')
+                          for chunk in iter_dataset_chunks(dataset_path, chunksize=chunksize, columns=['SK_ID_CURR'])])
+    matrix = None
+    topk = None
+    offset = 0
+    for chunk in iter_dataset_chunks(dataset_path, chunksize=chunksize):
+        X = chunk.drop(columns=[c for c in ('SK_ID_CURR', 'TARGET') if c in chunk.columns])
+        X_trans = np.asarray(preprocessor.transform(X.replace([np.inf, -np.inf], np.nan)), dtype='float64')
+        values = shap_values_class1(explainer.shap_values(X_trans))
+        if matrix is None:
+            k = min(k, values.shape[1])
+            matrix = IndexedMatrix.create(base, ids, values.shape[1])
+            topk = np.lib.format.open_memmap(f"{base}.topk.npy.tmp", mode='w+', dtype='int32', shape=(len(ids), k))
+        rows = slice(offset, offset + len(values))
+        matrix[rows] = values
+        topk[rows] = top_k_shap(values, k)
+        offset += len(values)
+        if progress is not None:
+            progress(offset)
+    if matrix is None:
+        raise RuntimeError(f"No rows to explain in {dataset_path}")
+    matrix.flush()
+    topk.flush()
+    del matrix, topk
+
+    expected_value = explainer.expected_value
+    if np.ndim(expected_value):
+        expected_value = np.ravel(expected_value)[-1]
+    IndexedMatrix.commit(base, suffixes=('.npy', '.topk.npy'),
+                         columns=[str(f) for f in feature_names] if feature_names is not None else None,
+                         model_version=model_version,
+                         expected_value=float(expected_value),
+                         k=int(k))
+    return {'rows': offset, 'seconds': time.perf_counter() - start, 'base': base}
+
+
+def build_feature_matrix(pipeline, dataset_path='data/dataset_sample.csv', base='ressource/feature_matrix',
+                         feature_names=None, model_version=None, chunksize=50000, dtype='float32', progress=None):
+    """
+    Run pipeline[:-1].transform over the whole dataset once and store the result
+    as a memory-mapped IndexedMatrix (one transformed row per SK_ID_CURR).
+
+    float32 halves the size of the matrix; use dtype='float64' to keep the exact
+    preprocessor output.
+
+    Returns:
+        dict with rows, seconds and base.
+    """
+    start = time.perf_counter()
+    preprocessor = pipeline[:-1]
+    ids = np.concatenate([chunk['SK_ID_CURR'].to_numpy(dtype='int64')
+                          for chunk in iter_dataset_chunks(dataset_path, chunksize=chunksize, columns=['SK_ID_CURR'])])
+    matrix = None
+    offset = 0
+    for chunk in iter_dataset_chunks(dataset_path, chunksize=chunksize):
+        X = chunk.drop(columns=[c for c in ('SK_ID_CURR', 'TARGET') if c in chunk.columns])
+        X_trans = np.asarray(preprocessor.transform(X.replace([np.inf, -np.inf], np.nan)))
+        if matrix is None:
+            matrix = IndexedMatrix.create(base, ids, X_trans.shape[1], dtype=dtype)
+        matrix[offset:offset + len(X_trans)] = X_trans
+        offset += len(X_trans)
+        if progress is not None:
+            progress(offset)
+    if matrix is None:
+        raise RuntimeError(f"No rows to transform in {dataset_path}")
+    matrix.flush()
+    del matrix
+
+    IndexedMatrix.commit(base,
+                         columns=[str(f) for f in feature_names] if feature_names is not None else None,
+                         model_version=model_version,
+                         dtype=dtype)
+    return {'rows': offset, 'seconds': time.perf_counter() - start, 'base': base}
+
+
+def load_feature_matrix(base='ressource/feature_matrix', model_version=None):
+    """Open the transformed feature matrix (see build_feature_matrix), None if absent or stale."""
+    return open_indexed_matrix(base, cls=IndexedMatrix, model_version=model_version)
+
+
+_READINESS = {'ready': False, 'started_at': None, 'finished_at': None, 'steps': {}, 'errors': {}}
+_READINESS_LOCK = threading.Lock()
+
+
+def readiness():
+    """Warm-up state of the process: ready flag, timestamps, per-step seconds and errors."""
+    with _READINESS_LOCK:
+        return {**_READINESS, 'steps': dict(_READINESS['steps']), 'errors': dict(_READINESS['errors'])}
+
+
+def is_ready():
+    """True once warm_up has completed successfully in this process."""
+    return _READINESS['ready']
+
+
+def warm_up(dataset='data/dataset_sample.csv', application='data/application_sample.csv',
+            pipeline_path='ressource/pipeline.joblib', feats_path='ressource/feats',
+            explainer_path='ressource/shap_explainer', score_store_path='data/scores.parquet',
+            descriptions_path='data/HomeCredit_columns_description.csv', ready_file=None):
+    """
+    Preload everything the first request needs so no user pays the cold start.
+
+    Loads the datasets, the pipeline, the feature names and descriptions, the
+    SHAP explainer and the precomputed stores into the process caches, then runs one prediction
+    and one SHAP explanation on the first client (LightGBM and SHAP are slow on
+    their first call). Optional steps (feats, descriptions, explainer, stores) that fail are
+    recorded in the errors but do not prevent readiness; the pipeline and the
+    dummy prediction are required.
+
+    Args:
+        dataset: Path or already loaded DataFrame of the model features.
+        application: Path of the application table, None to skip it.
+        ready_file: If given, the readiness report is written there as JSON once ready.
+
+    Returns:
+        The readiness report (see readiness()).
+    """
+    with _READINESS_LOCK:
+        _READINESS.update(ready=False, started_at=time.time(), finished_at=None, steps={}, errors={})
+
+    def _step(name, func, required=False):
+        start = time.perf_counter()
+        try:
+            return func()
+        except Exception as exc:
+            with _READINESS_LOCK:
+                _READINESS['errors'][name] = str(exc)
+            if required:
+                raise
+            return None
+        finally:
+            with _READINESS_LOCK:
+                _READINESS['steps'][name] = time.perf_counter() - start
 
     try:
-        proba = None
-        # scikit-learn like
-        if hasattr(classifier, 'predict_proba'):
-            proba = classifier.predict_proba(X_trans)[0][1]
-        elif hasattr(classifier, 'predict'):
-            # if only predict exists, assume returns probability-like score
-            proba = float(classifier.predict(X_trans)[0])
-        else:
-            raise RuntimeError('Classifier has no predict_proba nor predict')
-        return float(proba)
-    except Exception as exc:
-        raise RuntimeError(f"Classifier prediction failed: {exc}")
+        df = dataset if isinstance(dataset, pd.DataFrame) else _step('dataset', lambda: load_dataset(dataset), required=True)
+        if application is not None:
+            _step('application', lambda: load_dataset(application))
+        pipeline = _step('pipeline', lambda: load_pipeline(pipeline_path), required=True)
+        model_version = _MODEL_REGISTRY.version(pipeline_path)
+        clf = pipeline.named_steps['classifier']
+        _step('feats', lambda: load_feats(feats_path))
+        if descriptions_path:
+            _step('descriptions', lambda: load_column_descriptions(descriptions_path))
+        explainer = _step('explainer', lambda: load_cached_shap_explainer(explainer_path, clf, pipeline_path))
+        _step('stores', lambda: (load_feature_matrix(model_version=model_version),
+                                 load_shap_store(model_version=model_version),
+                                 load_score_store(score_store_path) if score_store_path else None))
+
+        X = df.iloc[:1].drop(columns=[c for c in ('SK_ID_CURR', 'TARGET') if c in df.columns])
+        X_trans = _step('transform', lambda: np.asarray(pipeline[:-1].transform(X)), required=True)
+        _step('prediction', lambda: predict_local(X, clf, None, X_trans=X_trans), required=True)
+        compiled = _step('compiled', lambda: load_compiled_pipeline(pipeline_path))
+        if compiled is not None:
+            _step('compiled_prediction', lambda: compiled[1].predict_proba(compiled[0].transform(X)))
+        if explainer is not None:
+            _step('shap', lambda: explainer.shap_values(np.asarray(X_trans, dtype='float64')))
+    except Exception:
+        with _READINESS_LOCK:
+            _READINESS['finished_at'] = time.time()
+        return readiness()
+
+    with _READINESS_LOCK:
+        _READINESS.update(ready=True, finished_at=time.time())
+    report = readiness()
+    if ready_file:
+        with open(ready_file, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+# Feature name mapping for user-friendly display
+FRIENDLY_FEATURE_NAMES = {
+    # Informations personnelles
+    'CNT_CHILDREN': 'Number of Children',
+    'CNT_FAM_MEMBERS': 'Family Members',
+    'DAYS_BIRTH': 'Age (days)',
+    'DAYS_EMPLOYED': 'Employment Duration (days)',
+    'DAYS_REGISTRATION': 'Registration Duration (days)',
+    'DAYS_ID_PUBLISH': 'ID Publication Date (days)',
+    'DAYS_LAST_PHONE_CHANGE': 'Phone Change Date (days)',
+    'OWN_CAR_AGE': 'Car Age (years)',
+
+    # Financial Information
+    'AMT_INCOME_TOTAL': 'Total Income',
+    'AMT_CREDIT': 'Credit Amount',
+    'AMT_ANNUITY': 'Loan Annuity',
+    'AMT_GOODS_PRICE': 'Goods Price',
+    'REGION_POPULATION_RELATIVE': 'Regional Population (relative)',
+
+    # External Scores
+    'EXT_SOURCE_1': 'External Score 1',
+    'EXT_SOURCE_2': 'External Score 2',
+    'EXT_SOURCE_3': 'External Score 3',
+
+    # Building Information
+    'APARTMENTS_AVG': 'Apartments (avg)',
+    'BASEMENTAREA_AVG': 'Basement Area (avg)',
+    'YEARS_BEGINEXPLUATATION_AVG': 'Building Age (avg)',
+    'YEARS_BUILD_AVG': 'Construction Year (avg)',
+    'COMMONAREA_AVG': 'Common Area (avg)',
+    'ELEVATORS_AVG': 'Elevators (avg)',
+    'ENTRANCES_AVG': 'Entrances (avg)',
+    'FLOORSMAX_AVG': 'Max Floors (avg)',
+    'FLOORSMIN_AVG': 'Min Floors (avg)',
+    'LANDAREA_AVG': 'Land Area (avg)',
+    'LIVINGAPARTMENTS_AVG': 'Living Apartments (avg)',
+    'LIVINGAREA_AVG': 'Living Area (avg)',
+    'NONLIVINGAPARTMENTS_AVG': 'Non-living Apartments (avg)',
+    'NONLIVINGAREA_AVG': 'Non-living Area (avg)',
+    'TOTALAREA_MODE': 'Total Area (mode)',
+
+    # Building Information (Mode)
+    'APARTMENTS_MODE': 'Apartments (mode)',
+    'BASEMENTAREA_MODE': 'Basement Area (mode)',
+    'YEARS_BEGINEXPLUATATION_MODE': 'Building Age (mode)',
+    'YEARS_BUILD_MODE': 'Construction Year (mode)',
+    'COMMONAREA_MODE': 'Common Area (mode)',
+    'ELEVATORS_MODE': 'Elevators (mode)',
+    'ENTRANCES_MODE': 'Entrances (mode)',
+    'FLOORSMAX_MODE': 'Max Floors (mode)',
+    'FLOORSMIN_MODE': 'Min Floors (mode)',
+    'LANDAREA_MODE': 'Land Area (mode)',
+    'LIVINGAPARTMENTS_MODE': 'Living Apartments (mode)',
+    'LIVINGAREA_MODE': 'Living Area (mode)',
+    'NONLIVINGAPARTMENTS_MODE': 'Non-living Apartments (mode)',
+    'NONLIVINGAREA_MODE': 'Non-living Area (mode)',
+
+    # Building Information (Median)
+    'APARTMENTS_MEDI': 'Apartments (median)',
+    'BASEMENTAREA_MEDI': 'Basement Area (median)',
+    'YEARS_BEGINEXPLUATATION_MEDI': 'Building Age (median)',
+    'YEARS_BUILD_MEDI': 'Construction Year (median)',
+    'COMMONAREA_MEDI': 'Common Area (median)',
+    'ELEVATORS_MEDI': 'Elevators (median)',
+    'ENTRANCES_MEDI': 'Entrances (median)',
+    'FLOORSMAX_MEDI': 'Max Floors (median)',
+    'FLOORSMIN_MEDI': 'Min Floors (median)',
+    'LANDAREA_MEDI': 'Land Area (median)',
+    'LIVINGAPARTMENTS_MEDI': 'Living Apartments (median)',
+    'LIVINGAREA_MEDI': 'Living Area (median)',
+    'NONLIVINGAPARTMENTS_MEDI': 'Non-living Apartments (median)',
+    'NONLIVINGAREA_MEDI': 'Non-living Area (median)',
+
+    # Social Circle
+    'OBS_30_CNT_SOCIAL_CIRCLE': 'Social Circle Observations (30 days)',
+    'DEF_30_CNT_SOCIAL_CIRCLE': 'Social Circle Defaults (30 days)',
+    'OBS_60_CNT_SOCIAL_CIRCLE': 'Social Circle Observations (60 days)',
+    'DEF_60_CNT_SOCIAL_CIRCLE': 'Social Circle Defaults (60 days)',
+
+    # Credit Bureau
+    'AMT_REQ_CREDIT_BUREAU_HOUR': 'Credit Bureau Requests (last hour)',
+    'AMT_REQ_CREDIT_BUREAU_DAY': 'Credit Bureau Requests (last day)',
+    'AMT_REQ_CREDIT_BUREAU_WEEK': 'Credit Bureau Requests (last week)',
+    'AMT_REQ_CREDIT_BUREAU_MON': 'Credit Bureau Requests (last month)',
+    'AMT_REQ_CREDIT_BUREAU_QRT': 'Credit Bureau Requests (last quarter)',
+    'AMT_REQ_CREDIT_BUREAU_YEAR': 'Credit Bureau Requests (last year)',
+
+    # Regional Ratings
+    'REGION_RATING_CLIENT': 'Regional Client Rating',
+    'REGION_RATING_CLIENT_W_CITY': 'Regional City Rating',
+
+    # Flags
+    'REG_REGION_NOT_LIVE_REGION': 'Registration Region ≠ Living Region',
+    'REG_REGION_NOT_WORK_REGION': 'Registration Region ≠ Work Region',
+    'LIVE_REGION_NOT_WORK_REGION': 'Living Region ≠ Work Region',
+    'REG_CITY_NOT_LIVE_CITY': 'Registration City ≠ Living City',
+    'REG_CITY_NOT_WORK_CITY': 'Registration City ≠ Work City',
+    'LIVE_CITY_NOT_WORK_CITY': 'Living City ≠ Work City',
+
+    # Documents
+    'FLAG_DOCUMENT_2': 'Document 2 Provided',
+    'FLAG_DOCUMENT_3': 'Document 3 Provided',
+    'FLAG_DOCUMENT_4': 'Document 4 Provided',
+    'FLAG_DOCUMENT_5': 'Document 5 Provided',
+    'FLAG_DOCUMENT_6': 'Document 6 Provided',
+    'FLAG_DOCUMENT_7': 'Document 7 Provided',
+    'FLAG_DOCUMENT_8': 'Document 8 Provided',
+    'FLAG_DOCUMENT_9': 'Document 9 Provided',
+    'FLAG_DOCUMENT_10': 'Document 10 Provided',
+    'FLAG_DOCUMENT_11': 'Document 11 Provided',
+    'FLAG_DOCUMENT_12': 'Document 12 Provided',
+    'FLAG_DOCUMENT_13': 'Document 13 Provided',
+    'FLAG_DOCUMENT_14': 'Document 14 Provided',
+    'FLAG_DOCUMENT_15': 'Document 15 Provided',
+    'FLAG_DOCUMENT_16': 'Document 16 Provided',
+    'FLAG_DOCUMENT_17': 'Document 17 Provided',
+    'FLAG_DOCUMENT_18': 'Document 18 Provided',
+    'FLAG_DOCUMENT_19': 'Document 19 Provided',
+    'FLAG_DOCUMENT_20': 'Document 20 Provided',
+    'FLAG_DOCUMENT_21': 'Document 21 Provided',
+
+    # Contact Flags
+    'FLAG_MOBIL': 'Mobile Phone Provided',
+    'FLAG_EMP_PHONE': 'Work Phone Provided',
+    'FLAG_WORK_PHONE': 'Work Phone Available',
+    'FLAG_CONT_MOBILE': 'Mobile Contact Available',
+    'FLAG_PHONE': 'Home Phone Provided',
+    'FLAG_EMAIL': 'Email Provided',
+
+    # Application Details
+    'HOUR_APPR_PROCESS_START': 'Application Hour',
+    'WEEKDAY_APPR_PROCESS_START': 'Application Weekday',
+}
+
+
+def get_friendly_feature_names():
+    """Map technical feature names to user-friendly labels"""
+    return FRIENDLY_FEATURE_NAMES
+
+
+def format_feature_name(feature_name):
+    """Convert technical feature name to user-friendly label"""
+    return FRIENDLY_FEATURE_NAMES.get(feature_name, feature_name)
+
+
+def _read_column_descriptions(path, preferred_table='application_{train|test}.csv'):
+    description = pd.read_csv(path, encoding='ISO-8859-1', usecols=['Table', 'Row', 'Description'])
+    # The same column name can be described for several tables: keep the
+    # application table's description, otherwise the first one.
+    description['preferred'] = description['Table'] != preferred_table
+    description = description.sort_values('preferred', kind='stable').drop_duplicates('Row')
+    return dict(zip(description['Row'], description['Description'].fillna('')))
+
+
+def load_column_descriptions(path='data/HomeCredit_columns_description.csv'):
+    """
+    Column name -> description dictionary, read once per process (reloaded if
+    the file changes). Missing columns are simply absent: use .get(name, '').
+    """
+    return _MODEL_REGISTRY.get(path, loader=_read_column_descriptions, name=f"descriptions:{path}")
 
 
 def plot_gauge(prediction_default):
+    import plotly.graph_objects as go
+
     # Determine color based on risk level
     if prediction_default < 30:
         bar_color = '#2ecc71'  # Green
@@ -214,125 +2529,168 @@ def plot_gauge(prediction_default):
 
     return fig_gauge
 
-def format_shap_values(shap_values, feature_names):
+def _shap_frame(features, shap_values, absolute_values):
+    """Plotting frame of already selected (and ordered) SHAP values."""
+    df = pd.DataFrame({
+        "features": features,
+        "shap_values": shap_values,
+        "absolute_values": absolute_values
+    })
+
+    # Ajout des colonnes de signe et couleur
+    df["left"] = np.where(shap_values < 0, shap_values, 0)
+    df["right"] = np.where(shap_values > 0, shap_values, 0)
+    df["color"] = np.where(shap_values > 0, "#D73027", "#1A9851")
+
+    # Liste des features dans l'ordre inverse pour affichage
+    most_important_features = df["features"].iloc[::-1].tolist()
+
+    return df, most_important_features
+
+
+def format_shap_values(shap_values, feature_names, k=15, top=None):
     """
     Format shap values into a dataframe to be plotted with Plotly.
-    Returns the 15 most important shap values with colors and signs.
+    Returns the k most important shap values with colors and signs.
+
+    Only the k selected features are materialized (see top_k_shap). top is
+    optional precomputed column indices by decreasing |SHAP| (for instance
+    ShapStore.top_k); the first k of them are used instead of selecting again.
     """
+    shap_values = np.asarray(shap_values)
 
     # Si shap_values est 2D (par exemple shap_values.shape = (n_samples, n_features))
     # on prend la moyenne absolue par feature
-    if len(shap_values.shape) > 1:
+    if shap_values.ndim > 1:
         shap_values_mean = np.abs(shap_values).mean(axis=0)
         shap_values_single = shap_values.mean(axis=0)
     else:
         shap_values_mean = np.abs(shap_values)
         shap_values_single = shap_values
 
-    # Crée le DataFrame avec les vrais noms de features
-    df = pd.DataFrame({
-        "features": feature_names,
-        "shap_values": shap_values_single,
-        "absolute_values": shap_values_mean
-    })
+    if top is not None and len(top) >= min(k, len(shap_values_mean)):
+        top = np.asarray(top)[:k]
+    else:
+        top = top_k_shap(shap_values_mean, k)
+    return _shap_frame(np.asarray(feature_names, dtype=object)[top],
+                       shap_values_single[top],
+                       shap_values_mean[top])
 
-    # Trie par importance
-    df.sort_values(by="absolute_values", ascending=False, inplace=True)
-    df.reset_index(drop=True, inplace=True)
 
-    # Ajout des colonnes de signe et couleur
-    df["left"] = df["shap_values"].where(df["shap_values"] < 0, 0)
-    df["right"] = df["shap_values"].where(df["shap_values"] > 0, 0)
-    df["color"] = np.where(df["shap_values"] > 0, "#D73027", "#1A9851")
+def format_shap_values_batch(shap_values, feature_names, k=15):
+    """
+    Per-client version of format_shap_values for a batch of SHAP values.
 
-    # Sélectionne les 15 plus importants
-    shap_explained = df.head(15).copy()
+    Args:
+        shap_values: Array of shape (n_samples, n_features).
+        feature_names: The n_features names.
+        k: Number of features kept per sample.
 
-    # Liste des features dans l'ordre inverse pour affichage
-    most_important_features = shap_explained["features"].iloc[::-1].tolist()
+    Returns:
+        List with one (shap_explained, most_important_features) pair per sample.
+    """
+    shap_values = np.asarray(shap_values)
+    feature_names = np.asarray(feature_names, dtype=object)
+    top = top_k_shap(shap_values, k)
+    selected = np.take_along_axis(shap_values, top, axis=1)
+    return [_shap_frame(feature_names[indices], values, np.abs(values))
+            for indices, values in zip(top, selected)]
+
+
+_IMPORTANT_FEATURES_LAYOUT = None
+
+
+def _important_features_layout():
+    """Layout of the SHAP bar chart, built and validated once per process."""
+    global _IMPORTANT_FEATURES_LAYOUT
+    if _IMPORTANT_FEATURES_LAYOUT is None:
+        import plotly.graph_objects as go
+
+        _IMPORTANT_FEATURES_LAYOUT = go.Layout(
+            title={
+                'text': "Facteurs les plus importants dans la décision de l'algorithme",
+                'x': 0.5,
+                'xanchor': 'center',
+                'font': {'size': 16, 'color': '#2c3e50'}
+            },
+            height=500,
+            margin=dict(l=200, r=50, t=80, b=50),
+            hovermode='closest',
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            xaxis=dict(
+                title=dict(text="Impact sur la sortie du modèle", font=dict(color='#2c3e50', size=14)),
+                gridcolor='lightgray',
+                zeroline=True,
+                zerolinecolor='black',
+                zerolinewidth=2,
+                tickfont=dict(color='#333', size=12)
+            ),
+            yaxis=dict(
+                title=dict(text="Informations du client", font=dict(color='#2c3e50', size=14)),
+                gridcolor='lightgray',
+                tickfont=dict(color='#333', size=12)
+            )
+        )
+    return _IMPORTANT_FEATURES_LAYOUT
 
-    return shap_explained, most_important_features
 
-def plot_important_features(shap_explained, most_important_features):
+def plot_important_features(shap_explained):
     """
     Create a Plotly horizontal bar chart for SHAP feature importance.
     Red bars = increase risk, Green bars = decrease risk
+
+    Takes the frame returned by format_shap_values (already limited to the top
+    features, most important first) and draws all bars as a single trace
+    with a per-bar color array; the layout is shared by every figure, so only
+    the data arrays change between clients.
     """
+    import plotly.graph_objects as go
+
     # Reverse order for plotting (most important at top)
-    shap_plot = shap_explained.iloc[::-1].copy()
-    
-    # Create Plotly figure with custom colors for each bar
-    fig = go.Figure()
-    
-    # Add bars with individual colors
-    for idx, row in shap_plot.iterrows():
-        fig.add_trace(go.Bar(
-            x=[row['shap_values']],
-            y=[row['features']],
-            orientation='h',
-            marker=dict(color=row['color']),
-            hovertemplate='<b>%{y}</b><br>Impact: %{x:.4f}<extra></extra>',
-            showlegend=False
-        ))
-    
-    # Update layout
-    fig.update_layout(
-        title={
-            'text': "Facteurs les plus importants dans la décision de l'algorithme",
-            'x': 0.5,
-            'xanchor': 'center',
-            'font': {'size': 16, 'color': '#2c3e50'}
-        },
-        xaxis_title="Impact sur la sortie du modèle",
-        yaxis_title="Informations du client",
-        height=500,
-        margin=dict(l=200, r=50, t=80, b=50),
-        hovermode='closest',
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        xaxis=dict(
-            gridcolor='lightgray',
-            zeroline=True,
-            zerolinecolor='black',
-            zerolinewidth=2,
-            tickfont=dict(color='#333', size=12),
-            titlefont=dict(color='#2c3e50', size=14)
-        ),
-        yaxis=dict(
-            gridcolor='lightgray',
-            tickfont=dict(color='#333', size=12),
-            titlefont=dict(color='#2c3e50', size=14)
-        )
+    shap_plot = shap_explained.iloc[::-1]
+
+    bars = go.Bar(
+        x=shap_plot['shap_values'].to_numpy(),
+        y=shap_plot['features'].to_numpy(),
+        orientation='h',
+        marker=dict(color=shap_plot['color'].to_numpy()),
+        hovertemplate='<b>%{y}</b><br>Impact: %{x:.4f}<extra></extra>',
+        showlegend=False
     )
-    
-    return fig
+    return go.Figure(data=[bars], layout=_important_features_layout())
 
 
-def plot_feature_distrib(feature_distrib, client_line, hist_source, data_client_value, max_histogram):
+def plot_feature_distrib(feature_distrib, client_line, hist_source, data_client_value, max_histogram,
+                         client_percentile=None):
     """
     Create a Plotly histogram showing feature distribution with client's position.
+
+    hist_source can come straight from FeatureStats.histogram; when
+    client_percentile is given it is shown in the client annotation.
     """
+    import plotly.graph_objects as go
+
     # Extract histogram data
     hist_df = hist_source.data if hasattr(hist_source, 'data') else hist_source
+    edges_left = np.asarray(hist_df['edges_left'], dtype=float)
+    edges_right = np.asarray(hist_df['edges_right'], dtype=float)
     
     # Create the bar chart for histogram
     fig = go.Figure()
     
     # Add histogram bars
     fig.add_trace(go.Bar(
-        x=[(hist_df['edges_left'][i] + hist_df['edges_right'][i]) / 2 
-           for i in range(len(hist_df['edges_left']))],
+        x=(edges_left + edges_right) / 2,
         y=hist_df['hist'],
-        width=[hist_df['edges_right'][i] - hist_df['edges_left'][i] 
-               for i in range(len(hist_df['edges_left']))],
+        width=edges_right - edges_left,
         marker=dict(
             color='steelblue',
             opacity=0.7,
             line=dict(color='white', width=1)
         ),
         hovertemplate='<b>Plage :</b> %{customdata[0]:.2f} à %{customdata[1]:.2f}<br><b>Nombre :</b> %{y}<extra></extra>',
-        customdata=[[hist_df['edges_left'][i], hist_df['edges_right'][i]] 
-                    for i in range(len(hist_df['edges_left']))],
+        customdata=np.column_stack([edges_left, edges_right]),
         name='Distribution'
     ))
     
@@ -347,10 +2705,13 @@ def plot_feature_distrib(feature_distrib, client_line, hist_source, data_client_
     ))
     
     # Add annotation for client's value
+    annotation_text = "Valeur du client"
+    if client_percentile is not None:
+        annotation_text += f" ({client_percentile:.0f}e centile)"
     fig.add_annotation(
         x=data_client_value[0],
         y=max_histogram * 1.05,
-        text="Valeur du client",
+        text=annotation_text,
         showarrow=True,
         arrowhead=2,
         arrowcolor='orange',
@@ -387,3 +2748,226 @@ def plot_feature_distrib(feature_distrib, client_line, hist_source, data_client_
     
     return fig
 
+
+
+def compute_box_stats(data, x, y, max_outliers=100, random_state=0):
+    """
+    Compute box-plot statistics of y for each group of x, server side.
+
+    Quartiles use Plotly's "inclusive" method (median of each half, median
+    included), whiskers extend to the last point within 1.5 IQR. Everything is
+    vectorized over a single sort of the data.
+
+    Args:
+        data: Source DataFrame.
+        x: Grouping column.
+        y: Numeric column to summarize.
+        max_outliers: Maximum number of outliers kept per group; the sample always
+            contains the group's minimum and maximum.
+        random_state: Seed of the outlier sampling.
+
+    Returns:
+        (stats, outliers): stats is indexed by group with q1, median, q3,
+        lowerfence, upperfence, mean and count columns; outliers has the x and y
+        columns of the sampled outlier points.
+    """
+    frame = data[[x, y]].copy() if x != y else data[[x]].copy()
+    values = pd.to_numeric(frame[y], errors='coerce').to_numpy(dtype='float64')
+    keep = np.isfinite(values) & frame[x].notna().to_numpy()
+    frame = frame.loc[keep]
+    values = values[keep]
+
+    codes, groups = pd.factorize(frame[x], sort=True)
+    order = np.lexsort((values, codes))
+    codes = codes[order]
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=len(groups))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    def _median_at(offset, size):
+        return (sorted_values[offset + (size - 1) // 2] + sorted_values[offset + size // 2]) / 2
+
+    half = (counts + 1) // 2
+    q1 = _median_at(starts, half)
+    median = _median_at(starts, counts)
+    q3 = _median_at(starts + counts - half, half)
+    iqr = q3 - q1
+
+    low_limit = np.repeat(q1 - 1.5 * iqr, counts)
+    high_limit = np.repeat(q3 + 1.5 * iqr, counts)
+    inside = (sorted_values >= low_limit) & (sorted_values <= high_limit)
+    lowerfence = pd.Series(np.where(inside, sorted_values, np.inf)).groupby(codes).min().to_numpy()
+    upperfence = pd.Series(np.where(inside, sorted_values, -np.inf)).groupby(codes).max().to_numpy()
+
+    stats = pd.DataFrame({
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': lowerfence,
+        'upperfence': upperfence,
+        'mean': np.bincount(codes, weights=sorted_values, minlength=len(groups)) / counts,
+        'count': counts,
+    }, index=pd.Index(groups, name=x))
+
+    outlier_values = pd.Series(sorted_values[~inside])
+    outlier_codes = codes[~inside]
+    if len(outlier_values):
+        shuffled = outlier_values.sample(frac=1, random_state=random_state)
+        sampled = shuffled.groupby(outlier_codes[shuffled.index]).head(max_outliers).index
+        by_group = outlier_values.groupby(outlier_codes)
+        extremes = by_group.idxmin().tolist() + by_group.idxmax().tolist()
+        selected = np.unique(np.concatenate([sampled.to_numpy(), extremes]))
+    else:
+        selected = np.array([], dtype=int)
+    outliers = pd.DataFrame({x: groups[outlier_codes[selected]], y: outlier_values.to_numpy()[selected]})
+    return stats, outliers
+
+
+_BOX_STATS_CACHE = LRUTTLCache(maxsize=256, ttl=float(os.getenv('PREDICTION_CACHE_TTL', 3600)))
+
+
+def cached_box_stats(data, x, y, max_outliers=100, dataset_key=None):
+    """
+    compute_box_stats memoized per process.
+
+    Entries are keyed on dataset_key, a stable identity of the data such as
+    dataset_fingerprint(path), so they are shared by every session and
+    refreshed when the file changes; the statistics do not depend on the
+    selected client. Without dataset_key nothing is cached.
+    """
+    if dataset_key is None:
+        return compute_box_stats(data, x, y, max_outliers=max_outliers)
+    key = (dataset_key, x, y, max_outliers)
+    result = _BOX_STATS_CACHE.get(key)
+    if result is None:
+        result = compute_box_stats(data, x, y, max_outliers=max_outliers)
+        _BOX_STATS_CACHE.set(key, result)
+    return result
+
+
+def plot_box_comparison(data, x, y, max_outliers=100, height=580, dataset_key=None):
+    """
+    Build a box plot of y by x from precomputed statistics.
+
+    Equivalent to px.box(data, x=x, y=y, color=x, points="outliers") with
+    quartilemethod="inclusive", but only the per-group summaries and a capped
+    outlier sample are sent to the browser instead of every row. With
+    dataset_key, the statistics are cached per process (see cached_box_stats).
+    """
+    import plotly.colors
+    import plotly.graph_objects as go
+
+    stats, outliers = cached_box_stats(data, x, y, max_outliers=max_outliers, dataset_key=dataset_key)
+    palette = plotly.colors.qualitative.Plotly
+    outliers_by_group = dict(tuple(outliers.groupby(x, observed=True)[y])) if len(outliers) else {}
+
+    fig = go.Figure()
+    for i, (group, row) in enumerate(stats.iterrows()):
+        color = palette[i % len(palette)]
+        fig.add_trace(go.Box(
+            x=[group],
+            q1=[row['q1']],
+            median=[row['median']],
+            q3=[row['q3']],
+            lowerfence=[row['lowerfence']],
+            upperfence=[row['upperfence']],
+            name=str(group),
+            legendgroup=str(group),
+            marker_color=color,
+            boxpoints=False,
+        ))
+        points = outliers_by_group.get(group)
+        if points is not None and len(points):
+            fig.add_trace(go.Scatter(
+                x=[group] * len(points),
+                y=points.to_numpy(),
+                mode='markers',
+                marker=dict(color=color, size=4, opacity=0.6),
+                name=str(group),
+                legendgroup=str(group),
+                showlegend=False,
+                hovertemplate=f'{y}: %{{y}}<extra>{group}</extra>',
+            ))
+
+    fig.update_layout(
+        height=height,
+        boxmode='overlay',
+        legend_title_text=x,
+        xaxis_title=x,
+        yaxis_title=y,
+    )
+    return fig
+
+
+def downsample_stratified(data, by, max_points, random_state=0):
+    """
+    Sample at most max_points rows while keeping the proportions of each group of by.
+
+    Returns data unchanged when it already fits in the budget.
+    """
+    if len(data) <= max_points:
+        return data
+    frac = max_points / len(data)
+    return data.groupby(by, observed=True, group_keys=False).sample(frac=frac, random_state=random_state)
+
+
+def plot_scatter_comparison(data, x, y, color='TARGET', client_x=None, client_y=None,
+                            max_points=5000, mode='auto', bins=60, height=580, random_state=0):
+    """
+    Scatter plot of y against x that stays responsive on large populations.
+
+    Modes:
+        - 'auto': every point up to max_points, stratified sample by color above
+        - 'sample': always the stratified sample (same as auto)
+        - 'density': server-side 2D histogram rendered as a heatmap
+
+    The client (client_x, client_y) is always drawn as a highlighted marker.
+
+    Returns:
+        (fig, n_points): the figure and the number of population points rendered
+        (number of non-empty cells in density mode).
+    """
+    import plotly.colors
+    import plotly.graph_objects as go
+
+    frame = data[[x, y, color]] if color not in (x, y) else data[[x, y]]
+    frame = frame[np.isfinite(frame[x].to_numpy(dtype='float64')) & np.isfinite(frame[y].to_numpy(dtype='float64'))]
+
+    fig = go.Figure()
+    if mode == 'density':
+        counts, x_edges, y_edges = np.histogram2d(frame[x], frame[y], bins=bins)
+        counts = np.where(counts > 0, counts, np.nan)
+        fig.add_trace(go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            z=counts.T,
+            colorscale='Blues',
+            colorbar=dict(title='Clients'),
+            hovertemplate=f'{x}: %{{x:.2f}}<br>{y}: %{{y:.2f}}<br>Clients : %{{z}}<extra></extra>',
+            name='Densité',
+        ))
+        n_points = int(np.count_nonzero(~np.isnan(counts)))
+    else:
+        sample = downsample_stratified(frame, color, max_points, random_state=random_state)
+        palette = plotly.colors.qualitative.Plotly
+        for i, (group, points) in enumerate(sample.groupby(color, observed=True, sort=True)):
+            fig.add_trace(go.Scattergl(
+                x=points[x].to_numpy(),
+                y=points[y].to_numpy(),
+                mode='markers',
+                marker=dict(color=palette[i % len(palette)], opacity=0.3),
+                name=str(group),
+            ))
+        n_points = len(sample)
+
+    if client_x is not None and client_y is not None:
+        fig.add_trace(go.Scattergl(
+            x=np.atleast_1d(client_x),
+            y=np.atleast_1d(client_y),
+            mode='markers',
+            marker=dict(size=10, color='red'),
+            name='client',
+        ))
+
+    fig.update_layout(height=height, legend_title_text=color, xaxis_title=x, yaxis_title=y)
+    return fig, n_points
@@ -0,0 +1,106 @@
+"""
+Warm the dashboard caches before serving traffic.
+
+Loads the datasets, the pipeline, the feature names, the SHAP explainer and
+the precomputed stores, and runs one prediction and one SHAP explanation.
+
+With --run SCRIPT, Streamlit is then started in this same process (remaining
+options are passed to `streamlit run`), so the dashboard sessions find every
+model and dataset already in the process caches. The server port is only
+opened once the warm-up succeeded, so the default TCP startup probe of Cloud
+Run doubles as the readiness check. Meant to run at container start:
+
+    python warmup.py --run dashboard.py --server.port=8080
+
+Without --run, the warm-up only validates the artifacts (and warms the OS page
+cache or rebuilds a stale explainer) in a separate process.
+
+With --serve PORT, a small HTTP endpoint answers GET /ready with 503 while
+warming up and 200 (readiness report of this process, as JSON) once ready,
+for HTTP startup probes. Without --run, the command then keeps running, so
+start it in the background (`&`).
+
+Usage:
+    python warmup.py [--dataset PATH] [--ready-file PATH] [--serve PORT] [--run SCRIPT [streamlit options]]
+
+Exits with status 1 when a required step (dataset, pipeline, prediction) fails.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import readiness, warm_up
+
+
+class ReadinessHandler(BaseHTTPRequestHandler):
+    """GET /ready -> 200 when warm, 503 otherwise; body is the readiness report."""
+
+    def do_GET(self):
+        if self.path.rstrip('/') not in ('/ready', ''):
+            self.send_error(404)
+            return
+        report = readiness()
+        body = json.dumps(report).encode()
+        self.send_response(200 if report['ready'] else 503)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preload models and data before serving the dashboard")
+    parser.add_argument('--dataset', default='data/dataset_sample.csv')
+    parser.add_argument('--application', default='data/application_sample.csv')
+    parser.add_argument('--pipeline', default='ressource/pipeline.joblib')
+    parser.add_argument('--ready-file', help="Write the readiness report to this file once ready")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="Expose GET /ready on this port")
+    parser.add_argument('--run', metavar='SCRIPT', help="Then run this Streamlit script in the same process")
+    args, streamlit_args = parser.parse_known_args()
+    if streamlit_args and not args.run:
+        parser.error(f"unrecognized arguments: {' '.join(streamlit_args)}")
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+
+    server = None
+    if args.serve:
+        server = ThreadingHTTPServer(('0.0.0.0', args.serve), ReadinessHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Readiness endpoint on http://0.0.0.0:{args.serve}/ready")
+
+    report = warm_up(dataset=args.dataset, application=args.application,
+                     pipeline_path=args.pipeline, ready_file=args.ready_file)
+    for step, seconds in report['steps'].items():
+        status = '✗' if step in report['errors'] else '✓'
+        print(f"{status} {step:<20}{seconds:>8.2f}s")
+    for step, error in report['errors'].items():
+        print(f"  {step}: {error}")
+
+    if not report['ready']:
+        print("✗ Warm-up failed")
+        sys.exit(1)
+    total = report['finished_at'] - report['started_at']
+    print(f"✓ Ready in {total:.1f}s")
+
+    if args.run:
+        # Same process: the sessions of the server share the caches warmed above
+        from streamlit.web import cli as streamlit_cli
+
+        sys.argv = ['streamlit', 'run', args.run, *streamlit_args]
+        sys.exit(streamlit_cli.main())
+
+    if server is not None:
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()